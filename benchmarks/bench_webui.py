@@ -0,0 +1,259 @@
+"""
+Load test for Atelier WebUI against a stub Atelier client.
+
+Starts AtelierWebUI in-process with a StubClient that answers every client
+method after a configurable latency with an image of a configurable size,
+then drives the Gradio queue API with many concurrent sessions, one tab at a
+time, and reports throughput, latency percentiles, queue depth and RSS.
+
+Usage:
+    python benchmarks/bench_webui.py --sessions 50 --requests 4 --latency 1.0
+    python benchmarks/bench_webui.py --tabs generate,upscale,caption --limit 20 --json bench_output.txt
+"""
+import os
+import io
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import asyncio
+import logging
+import argparse
+import resource
+import tempfile
+
+import httpx
+import gradio as gr
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from atelier_client_webui import AtelierWebUI
+
+LISTS = {
+    "list_atr_size":         ["1024x1024", "768x1344", "1344x768"],
+    "list_atr_remix_model":  ["remix-a", "remix-b"],
+    "list_atr_controlnets":  ["canny", "depth", "pose"],
+    "list_atr_lora_rt":      ["none", "rt-a"],
+    "list_atr_models":       ["model-a", "model-b"],
+    "list_atr_models_guide": ["guide-a", "guide-b"],
+    "list_atr_models_svi":   ["svi-a", "svi-b"],
+    "list_atr_g_types":      ["variation", "structure"],
+    "list_atr_lora_svi":     ["none", "svi-lora"],
+    "list_atr_lora_flux":    ["none", "flux-lora"],
+    "list_atr_g_variation":  ["low", "high"],
+    "list_atr_g_structure":  ["low", "high"],
+    "list_atr_g_facial":     ["low", "high"],
+    "list_atr_g_style":      ["low", "high"],
+    "list_atr_gfpgan":       ["v1.3", "v1.4"],
+    "list_sty_styles":       ["none", "cinematic"],
+}
+
+class StubClient:
+    """
+    Stand-in for an Atelier client with configurable latency and payload.
+
+    Parameters:
+    - latency (float): Default latency in seconds of every client method
+    - payload (int): Side in pixels of the returned square images
+    - latencies (dict): Per-method latency overrides, e.g. {"image_enhance": 4.0}
+    """
+    version = "bench"
+
+    def __init__(self, latency: float = 1.0, payload: int = 1024, latencies: dict = None):
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.logger = logging.getLogger("atelier-bench")
+        self.directory = tempfile.mkdtemp(prefix="atelier-bench-")
+        self.template = os.path.join(self.directory, "template.png")
+        Image.frombytes("RGB", (payload, payload), os.urandom(payload * payload * 3)).save(self.template)
+        for name, choices in LISTS.items():
+            setattr(self, name, list(choices))
+
+    def __getattr__(self, name):
+        if not name.startswith(("image_", "face_", "realtime_")):
+            raise AttributeError(name)
+
+        def call(*args):
+            time.sleep(self.latencies.get(name, self.latency))
+            if name in ("image_caption", "image_prompt"):
+                return f"stub {name}"
+            path = os.path.join(self.directory, uuid.uuid4().hex + ".png")
+            shutil.copyfile(self.template, path)
+            return path
+        call.__name__ = name
+        return call
+
+def rss():
+    """Return the resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def percentile(values: list, q: float):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+def start(port: int, client, **kwargs):
+    """Start AtelierWebUI without blocking and return its Blocks."""
+    captured = {}
+    launch, block_thread = gr.Blocks.launch, gr.Blocks.block_thread
+
+    def capture(self, *args, **options):
+        captured["demo"] = self
+        return launch(self, *args, **options)
+
+    gr.Blocks.launch, gr.Blocks.block_thread = capture, lambda self: None
+    try:
+        AtelierWebUI(client, port=port, browser=False, **kwargs)
+    finally:
+        gr.Blocks.launch, gr.Blocks.block_thread = launch, block_thread
+    if "demo" not in captured or not captured["demo"].is_running:
+        raise RuntimeError("AtelierWebUI failed to start")
+    return captured["demo"]
+
+class Bench:
+    def __init__(self, demo, base: str, sessions: int, requests: int):
+        self.demo = demo
+        self.base = base
+        self.sessions = sessions
+        self.requests = requests
+
+    def endpoints(self):
+        """Return {endpoint name: fn_index} of every upstream event."""
+        endpoints = {}
+        for index, fn in self.demo.fns.items():
+            if fn.concurrency_id and not str(fn.concurrency_id).isdigit() and fn.targets and not fn.show_api:
+                endpoints.setdefault(fn.concurrency_id, index)
+        return endpoints
+
+    async def upload(self, http, session: int):
+        buffer = io.BytesIO()
+        Image.new("RGB", (512, 512), (session % 256, random.randrange(256), 128)).save(buffer, "PNG")
+        r = await http.post(f"{self.base}/upload", files={"files": (f"input{session}.png", buffer.getvalue(), "image/png")})
+        r.raise_for_status()
+        return {"path": r.json()[0], "orig_name": f"input{session}.png", "meta": {"_type": "gradio.FileData"}}
+
+    def payload(self, fn, image: dict, session: int, n: int):
+        data = []
+        for block in fn.inputs:
+            if isinstance(block, gr.State):
+                data.append(None)
+            elif isinstance(block, gr.ImageEditor):
+                data.append({"background": image, "layers": [], "composite": image})
+            elif isinstance(block, gr.Image):
+                data.append(image)
+            elif isinstance(block, gr.Textbox):
+                data.append(f"benchmark prompt {session} {n}")
+            else:
+                data.append(block.value)
+        return data
+
+    async def call(self, http, fn_index: int, data: list, session_hash: str):
+        joined = time.perf_counter()
+        r = await http.post(f"{self.base}/queue/join", json={
+            "data": data, "fn_index": fn_index, "session_hash": session_hash,
+            "event_data": None, "trigger_id": None})
+        r.raise_for_status()
+        started = None
+        async with http.stream("GET", f"{self.base}/queue/data", params={"session_hash": session_hash}) as stream:
+            async for line in stream.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                message = json.loads(line[5:])
+                if message.get("msg") == "process_starts":
+                    started = time.perf_counter()
+                elif message.get("msg") == "process_completed":
+                    done = time.perf_counter()
+                    return message.get("success", False), done - joined, (started or done) - joined
+        return False, time.perf_counter() - joined, 0.0
+
+    async def session(self, http, fn, fn_index: int, session: int, stats: dict):
+        session_hash = uuid.uuid4().hex[:11]
+        image = await self.upload(http, session)
+        for n in range(self.requests):
+            ok, latency, wait = await self.call(http, fn_index, self.payload(fn, image, session, n), session_hash)
+            stats["latency"].append(latency)
+            stats["wait"].append(wait)
+            stats["errors"] += 0 if ok else 1
+
+    async def depth(self, http, stats: dict, stop: asyncio.Event):
+        while not stop.is_set():
+            try:
+                r = await http.get(f"{self.base}/queue/status")
+                stats["depth"] = max(stats["depth"], r.json().get("queue_size", 0))
+            except (httpx.HTTPError, ValueError):
+                pass
+            await asyncio.sleep(0.1)
+
+    async def run(self, name: str, fn_index: int):
+        fn = self.demo.fns[fn_index]
+        stats = {"latency": [], "wait": [], "errors": 0, "depth": 0}
+        limits = httpx.Limits(max_connections=self.sessions * 2 + 4)
+        async with httpx.AsyncClient(timeout=None, limits=limits) as http:
+            stop = asyncio.Event()
+            sampler = asyncio.ensure_future(self.depth(http, stats, stop))
+            begin = time.perf_counter()
+            await asyncio.gather(*[self.session(http, fn, fn_index, s, stats) for s in range(self.sessions)])
+            elapsed = time.perf_counter() - begin
+            stop.set()
+            await sampler
+        count = len(stats["latency"])
+        return {
+            "endpoint": name,
+            "requests": count,
+            "errors": stats["errors"],
+            "throughput": count / elapsed if elapsed else 0.0,
+            "p50": percentile(stats["latency"], 50),
+            "p95": percentile(stats["latency"], 95),
+            "p99": percentile(stats["latency"], 99),
+            "wait_p50": percentile(stats["wait"], 50),
+            "queue_depth": stats["depth"],
+            "rss_mb": rss(),
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Atelier WebUI against a stub client")
+    parser.add_argument("--sessions", type=int, default=50, help="concurrent simulated sessions per tab")
+    parser.add_argument("--requests", type=int, default=4, help="requests per session")
+    parser.add_argument("--latency", type=float, default=1.0, help="stub latency in seconds of every client method")
+    parser.add_argument("--latencies", type=json.loads, default=None, help='per-method latency overrides as JSON, e.g. \'{"image_enhance": 4}\'')
+    parser.add_argument("--payload", type=int, default=1024, help="side in pixels of the stub result images")
+    parser.add_argument("--tabs", default=None, help="comma-separated endpoints to run (default: all)")
+    parser.add_argument("--port", type=int, default=7899)
+    parser.add_argument("--limit", type=int, default=10, help="AtelierWebUI limit")
+    parser.add_argument("--workers", type=int, default=64, help="AtelierWebUI workers")
+    parser.add_argument("--options", type=json.loads, default={}, help="extra AtelierWebUI keyword arguments as JSON")
+    parser.add_argument("--json", default=None, help="also write the results as JSON to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("NO_PROXY", "localhost,127.0.0.1")
+    client = StubClient(args.latency, args.payload, args.latencies)
+    demo = start(args.port, client=client, limit=args.limit, workers=args.workers, **args.options)
+    bench = Bench(demo, f"http://127.0.0.1:{args.port}", args.sessions, args.requests)
+
+    endpoints = bench.endpoints()
+    selected = args.tabs.split(",") if args.tabs else list(endpoints)
+    results = []
+    print(f"{'endpoint':<12} {'reqs':>5} {'err':>4} {'req/s':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'wait':>7} {'depth':>5} {'rss MB':>7}")
+    for name in selected:
+        if name not in endpoints:
+            print(f"{name:<12} unknown endpoint")
+            continue
+        r = asyncio.run(bench.run(name, endpoints[name]))
+        results.append(r)
+        print(f"{r['endpoint']:<12} {r['requests']:>5} {r['errors']:>4} {r['throughput']:>7.2f} {r['p50']:>7.3f} "
+              f"{r['p95']:>7.3f} {r['p99']:>7.3f} {r['wait_p50']:>7.3f} {r['queue_depth']:>5} {r['rss_mb']:>7.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    demo.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,7 @@
-@import url('https://db.onlinewebfonts.com/c/91365a119c448bf9da6d8f710e3bdda6?family=Nokia+Sans+S60+Regular');
-
-@font-face {
-    font-family: "Nokia Sans S60 Regular";
-    src: url('https://db.onlinewebfonts.com/c/91365a119c448bf9da6d8f710e3bdda6?family=Nokia+Sans+S60+Regular') format('woff2');
-}
+/* @font-face rules for the installed and bundled fonts are generated by assets.py */
 
 * {
-    font-family: "Nokia Sans S60 Regular";
+    font-family: "Nokia Sans S60 Regular", ui-sans-serif, system-ui, sans-serif;
 }
 
 ::-webkit-scrollbar {
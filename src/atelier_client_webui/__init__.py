@@ -1,55 +1,144 @@
+import os
+import math
+import time
+import asyncio
+import inspect
+import tempfile
+import functools
+import PIL.Image
 import gradio as gr
 from datetime import datetime
 from gradio_modal import Modal
-from importlib import resources
+from gradio.context import LocalContext
+from fastapi.responses import PlainTextResponse
+from .history import History
+from .cache import ResultCache, digest, dhash
+from .proxy import ClientProxy
+from .aio import AsyncClient, preview
+from .scheduler import FairScheduler, current, status
+from .options import Options
+from .metrics import Metrics
+from .thumbnails import Thumbnails
+from .uploads import Uploads
+from .store import ResultStore, LocalStore
+from .tempfiles import TempFiles
+from .pool import ClientPool
+from .ratelimit import RateLimiter
+from .assets import CSS, FAMILY, mount
+from .pipelines import PIPELINES
+
+NAMES = {
+    "img": "image", "mas": "image", "pro": "prompt", "neg": "negative", "mod": "model", "typ": "model",
+    "siz": "size", "svi": "lora_svi", "flux": "lora_flux", "lra": "lora", "sed": "seed", "sty": "style",
+    "bat": "count", "gst": "strength", "str": "strength", "con": "control", "sca": "scale",
+    "cre": "creativity", "rsm": "resemblance", "fce": "face", "stl": "style_image",
+    "fco": "face_strength", "sst": "style_strength", "ops": "steps",
+}
 
 def AtelierWebUI(client, address: str = None, port: int = None, browser: bool = True,
-                 upload_size: str = "4MB", public: bool = False, limit: int = 10):
+                 upload_size: str = "4MB", public: bool = False, limit: int = 10,
+                 history: int = 50, page: int = 12, cache_dir: str = None,
+                 cache_size: int = 256, cache_ttl: int = 3600, workers: int = 64,
+                 limits: dict = None, weights: dict = None, refresh: int = 600, metrics: bool = True,
+                 thumbnail: int = 384, preprocess: bool = True, api: bool = False,
+                 store: ResultStore = None, store_size: int = 4096, temp_age: int = 86400, temp_size: int = 4096,
+                 rate: float = 0, burst: float = 10, rate_key: str = "user", usage: bool = False):
     """ 
     Start Atelier WebUI with all features.
     
     Parameters:
-    - client (Client): Atelier Client instance
+    - client (Client): Atelier Client instance, or a list of them to balance requests across
     - address (str): Server address
     - port (int): Server port
     - browser (bool): Launch browser automatically
     - upload_size (str): Maximum file size for uploads
     - public (bool): Enable public URL mode
     - limit (int): Maximum number of concurrent requests
+    - history (int): Maximum number of gallery items kept in memory per tab and session
+    - page (int): Number of gallery items sent to the browser per page
+    - cache_dir (str): Directory for on-disk data such as spilled gallery history and option snapshots
+    - cache_size (int): Size budget in MB of the shared result cache (0 to disable)
+    - cache_ttl (int): Time to live in seconds of cached results
+    - workers (int): Maximum number of blocking upstream calls in flight
+    - limits (dict): Per-endpoint concurrency limits, e.g. {"enhance": 2, "caption": 20}
+    - weights (dict): Per-endpoint scheduler costs, e.g. {"enhance": 4.0, "caption": 0.25}
+    - refresh (int): Interval in seconds for refreshing model, LoRA and style lists (0 to disable)
+    - metrics (bool): Expose Prometheus metrics at /metrics
+    - thumbnail (int): Size in pixels of gallery previews, full images load when opened (0 to disable)
+    - preprocess (bool): Downscale, strip and re-encode input images to the target size before upload
+    - api (bool): Expose every tab as a named API endpoint that returns result files instead of galleries
+    - store (ResultStore): Content-addressed store for result files, defaults to a LocalStore in cache_dir
+    - store_size (int): Size quota in MB of the default result store (0 to disable)
+    - temp_age (int): Age in seconds after which unreferenced uploads, previews and client outputs are removed (0 to disable)
+    - temp_size (int): Size budget in MB of each temporary file area (0 for no limit)
+    - rate (float): Endpoint cost each user may spend per second, e.g. 0.1 for six generations a minute (0 to disable)
+    - burst (float): Endpoint cost each user may spend at once
+    - rate_key (str): Rate limit users by "user" (login, else IP), "ip" or "session"
+    - usage (bool): Expose the rate limit ledger at /usage, it lists user names and IP addresses
     """
+    meter = Metrics()
+    if isinstance(client, (list, tuple)):
+        client = ClientPool(client, metrics=meter)
     try:
         # global sa
-        sa = client
+        cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "atelier-webui")
+        files = None
+        if temp_age > 0 or temp_size > 0:
+            files = TempFiles({
+                "gradio":     os.environ.get("GRADIO_TEMP_DIR") or os.path.join(tempfile.gettempdir(), "gradio"),
+                "uploads":    os.path.join(cache_dir, "uploads"),
+                "thumbnails": os.path.join(cache_dir, "thumbnails"),
+                "history":    os.path.join(cache_dir, "history"),
+            }, temp_age, temp_size << 20, metrics=meter)
+        if store is None and store_size > 0:
+            store = LocalStore(os.path.join(cache_dir, "results"), store_size << 20,
+                               keep=files.referenced if files is not None else None)
+        sa = ClientProxy(client, ResultCache(cache_size << 20, cache_ttl) if cache_size > 0 else None, store, files)
+        thumbnails = Thumbnails(os.path.join(cache_dir, "thumbnails"), thumbnail) if thumbnail > 0 else None
+        uploads = Uploads(os.path.join(cache_dir, "uploads")) if preprocess else None
+        limits = limits or {}
+        asa = AsyncClient(sa, workers, FairScheduler(workers, weights), meter, thumbnails, limits)
+        limiter = RateLimiter(rate, burst, weights, rate_key, meter) if rate > 0 else None
 
         # global ime_size, ime_remix_model, ime_controlnets, ime_lora, atr_models, atr_models_guide
         # global atr_models_svi, atr_guides, atr_lora_svi, atr_lora_flux, atr_size, atr_g_variation
         # global atr_g_structure, atr_g_facial, atr_g_style, sty_styles, version
         
-        ime_size         = sa.list_atr_size
-        ime_remix_model  = sa.list_atr_remix_model
-        ime_controlnets  = sa.list_atr_controlnets
-        ime_lora         = sa.list_atr_lora_rt
-        atr_models       = sa.list_atr_models
-        atr_models_guide = sa.list_atr_models_guide
-        atr_models_svi   = sa.list_atr_models_svi
-        atr_guides       = sa.list_atr_g_types
-        atr_lora_svi     = sa.list_atr_lora_svi
-        atr_lora_flux    = sa.list_atr_lora_flux
-        atr_size         = sa.list_atr_size
-        atr_g_variation  = sa.list_atr_g_variation
-        atr_g_structure  = sa.list_atr_g_structure
-        atr_g_facial     = sa.list_atr_g_facial
-        atr_g_style      = sa.list_atr_g_style
-        sty_styles       = sa.list_sty_styles
-        version          = sa.version
+        options = Options(sa, os.path.join(cache_dir, "options.json")).load()
+        if refresh > 0:
+            options.watch(refresh)
+
+        # One snapshot of the lists, a background refresh may replace them while the interface is built
+        with options.lock:
+            lists, built = options.lists, options.revision
+        ime_size         = lists["list_atr_size"]
+        ime_remix_model  = lists["list_atr_remix_model"]
+        ime_controlnets  = lists["list_atr_controlnets"]
+        ime_lora         = lists["list_atr_lora_rt"]
+        atr_models       = lists["list_atr_models"]
+        atr_models_guide = lists["list_atr_models_guide"]
+        atr_models_svi   = lists["list_atr_models_svi"]
+        atr_guides       = lists["list_atr_g_types"]
+        atr_lora_svi     = lists["list_atr_lora_svi"]
+        atr_lora_flux    = lists["list_atr_lora_flux"]
+        atr_size         = lists["list_atr_size"]
+        atr_g_variation  = lists["list_atr_g_variation"]
+        atr_g_structure  = lists["list_atr_g_structure"]
+        atr_g_facial     = lists["list_atr_g_facial"]
+        atr_g_style      = lists["list_atr_g_style"]
+        atr_gfpgan       = lists["list_atr_gfpgan"]
+        sty_styles       = lists["list_sty_styles"]
+        version          = lists["version"]
 
         system_theme = gr.themes.Default(
             primary_hue=gr.themes.colors.rose,
             secondary_hue=gr.themes.colors.rose,
-            neutral_hue=gr.themes.colors.zinc
+            neutral_hue=gr.themes.colors.zinc,
+            font=[FAMILY, "ui-sans-serif", "system-ui", "sans-serif"],
+            font_mono=["ui-monospace", "Consolas", "monospace"]
         )
 
-        css = str(resources.path(__name__, "__4.38.1__.py"))
+        css = CSS
 
         def Markdown(name:str):
             return gr.Markdown(f"{name}")
@@ -60,8 +149,14 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
         def Slider(min:int, max:int, step:float, value:int, label:str=None):
             return gr.Number(value=value, minimum=min, maximum=max, step=step, label=label)
 
+        sources = {id(choices): name for name, choices in lists.items()}
+        dropdowns = []
+
         def Dropdown(choices:list, value:str, label:str=None):
-            return gr.Dropdown(choices=choices, value=value, label=label, container=False if label is None else True)
+            dropdown = gr.Dropdown(choices=choices, value=value, label=label, container=False if label is None else True)
+            if id(choices) in sources:
+                dropdowns.append((dropdown, sources[id(choices)]))
+            return dropdown
 
         def Checkbox(name:str, value:bool):
             return gr.Checkbox(value=value, label=name, min_width=96)
@@ -81,6 +176,266 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
         def State(name:list):
             return gr.State(name)
 
+        def Memory():
+            return gr.State(History(history, page, os.path.join(cache_dir, "history"), files))
+
+        sessions = {}
+
+        def Keep(args):
+            # Remember the gallery histories of a browser session, API calls use throwaway ones without a spill directory
+            session = getattr(LocalContext.request.get(), "session_hash", None)
+            for arg in args:
+                if isinstance(arg, History) and arg.directory is not None:
+                    sessions.setdefault(session, set()).add(arg)
+
+        async def Close(request: gr.Request):
+            # Gradio only deletes states that an event returned, histories are mutated in place instead
+            for memory in sessions.pop(request.session_hash, ()):
+                memory.close()
+
+        async def Run(name:str, **values):
+            # Client method, argument order and input preparation come from the pipelines shared with batch mode
+            return await PIPELINES[name].run(asa, values, options, uploads)
+
+        async def Step(name:str, last:bool=True, **values):
+            # One call of a composite event runs under its own endpoint: its limit, scheduler cost and metrics.
+            # Only the last result of the event is shown, so earlier ones get no gallery preview.
+            tokens = current.set((name, current.get()[1])), preview.set(last)
+            try:
+                return await Run(name, **values)
+            finally:
+                current.reset(tokens[0])
+                preview.reset(tokens[1])
+
+        def Default(name:str, param:str):
+            return PIPELINES[name].default(param)
+
+        def Preview(items):
+            if thumbnails is None or not isinstance(items, list):
+                return items
+            return [(thumbnails.get(path), caption) for path, caption in items]
+
+        def Open(memory, evt: gr.SelectData):
+            items = memory.view()
+            if not 0 <= evt.index < len(items):
+                return gr.update()
+            view = Preview(items)
+            view[evt.index] = items[evt.index]
+            return gr.update(value=view, selected_index=evt.index)
+
+        def Older(gallery, memory):
+            # galleries show previews, the full image is only sent when an item is opened
+            gallery.select(Open, memory, gallery, show_progress='hidden', show_api=False)
+            return Button("Load More").click(
+                show_progress='hidden',
+                show_api=False,
+                fn=lambda x: Preview(x.more()),
+                inputs=[memory],
+                outputs=[gallery]
+            )
+
+        async def Ticker(name:str, state:dict):
+            # Upstream queue position while waiting, then an ETA from the rolling latency of the endpoint
+            progress = gr.Progress()
+            while True:
+                await asyncio.sleep(0.5)
+                ahead, started = state.get("ahead"), state.get("started")
+                if ahead is not None:
+                    progress(0.0, desc=f"Waiting for upstream | position {ahead() + 1}")
+                elif started is not None:
+                    elapsed = time.perf_counter() - started
+                    eta = asa.estimate(state.get("endpoint", name))
+                    if eta:
+                        progress(min(0.95, elapsed / eta), desc=f"Generating | about {max(1, math.ceil(eta - elapsed))}s left")
+                    else:
+                        progress(None, desc=f"Generating | {elapsed:.0f}s")
+
+        def Track(name:str, fn, outputs:list, preview:bool=True, admit=None):
+            def tag():
+                request = LocalContext.request.get()
+                joined = demo._queue.event_analytics.get(LocalContext.event_id.get(), {}).get("time")
+                if joined is not None:
+                    meter.observe("queue_wait_seconds", time.time() - joined, endpoint=name)
+                meter.inc("requests_total", endpoint=name)
+                meter.inc("in_flight", endpoint=name)
+                return current.set((name, getattr(request, "session_hash", None)))
+
+            def done(start:float, failed:bool):
+                meter.inc("in_flight", -1, endpoint=name)
+                meter.observe("handler_seconds", time.perf_counter() - start, endpoint=name)
+                if failed:
+                    meter.inc("errors_total", endpoint=name)
+
+            def show(value):
+                if not preview:
+                    return value
+                if len(outputs) == 1:
+                    return Preview(value) if isinstance(outputs[0], gr.Gallery) else value
+                return [Preview(v) if isinstance(o, gr.Gallery) else v for v, o in zip(value, outputs)]
+
+            if inspect.isasyncgenfunction(fn):
+                @functools.wraps(fn)
+                async def event(*args):
+                    if admit is not None:
+                        admit(LocalContext.request.get(), *args)
+                    start, failed = time.perf_counter(), True
+                    tag()
+                    Keep(args)
+                    state = {}
+                    status.set(state)
+                    ticker = asyncio.ensure_future(Ticker(name, state))
+                    try:
+                        async for value in fn(*args):
+                            yield show(value)
+                        failed = False
+                    finally:
+                        ticker.cancel()
+                        done(start, failed)
+            else:
+                @functools.wraps(fn)
+                async def event(*args):
+                    if admit is not None:
+                        admit(LocalContext.request.get(), *args)
+                    start, failed = time.perf_counter(), True
+                    token = tag()
+                    Keep(args)
+                    state = {}
+                    mark = status.set(state)
+                    ticker = asyncio.ensure_future(Ticker(name, state))
+                    try:
+                        results = await fn(*args)
+                        failed = False
+                        return show(results)
+                    finally:
+                        ticker.cancel()
+                        status.reset(mark)
+                        done(start, failed)
+                        current.reset(token)
+            return event
+
+        def Admit(name:str, steps=None, charge:bool=True):
+            # Events that run several upstream calls are charged the cost of each, `steps` returns their
+            # endpoints from the event inputs. Without `charge` the bucket is only checked, not taken from.
+            def admit(request: gr.Request, *args):
+                cost = None if steps is None else sum(limiter.cost(step) for step in steps(*args))
+                wait = (limiter.take if charge else limiter.check)(request, name, cost)
+                if wait:
+                    raise gr.Error(f"Rate limit reached, try again in {math.ceil(wait)} seconds.")
+            return admit
+
+        def Submit(button, name:str, fn, inputs:list, outputs:list, steps=None):
+            # The queued handler takes the cost, so requests sent straight to the queue are limited too.
+            # The unqueued check before it only rejects early, without taking a queue slot.
+            trigger = button.click
+            if limiter is not None:
+                trigger = button.click(Admit(name, steps, False), inputs if steps else None, None,
+                                       queue=False, show_progress='hidden', show_api=False).success
+            event = trigger(
+                show_progress='full',
+                show_api=False,
+                scroll_to_output=True,
+                fn=Track(name, fn, outputs, admit=Admit(name, steps) if limiter is not None else None),
+                inputs=inputs,
+                outputs=outputs,
+                concurrency_id=name,
+                concurrency_limit=limits.get(name, limit)
+            )
+            if api:
+                Endpoint(name, Track(name, fn, outputs, False), inputs, outputs, steps)
+            return event
+
+        def Live(toggle, triggers:list, name:str, fn, inputs:list, outputs:list, delay:float=0.3, interval:float=0.0):
+            # Regenerate on edits while `toggle` is checked, the browser sends nothing while it is unchecked.
+            # Every edit takes a ticket, a request that is superseded while it waits out the debounce delay is
+            # dropped, and a result older than the one on screen is never shown. The browser sends at most one
+            # pending request per session, and upstream calls of a session start at least `interval` seconds
+            # apart. Only requests that go upstream are tracked.
+            tickets = gr.State([0, 0, 0.0])
+            tracked = Track(name, fn, outputs)
+
+            def take(enabled, tickets):
+                tickets[0] += 1
+
+            async def live(enabled, tickets, *args):
+                if not enabled:
+                    return gr.update()
+                ticket = tickets[0]
+                await asyncio.sleep(max(delay, tickets[2] + interval - time.monotonic()))
+                if ticket != tickets[0]:
+                    return gr.update()
+                if limiter is not None and limiter.take(LocalContext.request.get(), name):
+                    return gr.update()
+                tickets[2] = time.monotonic()
+                results = await tracked(*args)
+                if ticket < tickets[1]:
+                    return gr.update()
+                tickets[1] = ticket
+                return results
+
+            # A promise that never settles stops the event in the browser, so an unchecked toggle costs no request
+            gate = "(enabled, tickets) => enabled ? [enabled, tickets] : new Promise(() => {})"
+            triggers = [getattr(t, "input", t) for t in triggers]
+            return gr.on(triggers, take, [toggle, tickets], None, js=gate, queue=False, show_progress='hidden', show_api=False).success(
+                live,
+                [toggle, tickets] + inputs,
+                outputs,
+                show_progress='hidden',
+                show_api=False,
+                trigger_mode='always_last',
+                concurrency_id=name,
+                concurrency_limit=limits.get(name, limit)
+            )
+
+        def Endpoint(name:str, fn, inputs:list, outputs:list, steps=None):
+            # Same handler without the session history: parameters in, result files or text out
+            params = [i for i in inputs if not isinstance(i, gr.State)]
+            stateful = len(params) < len(inputs)
+            files = isinstance(outputs[0], gr.Gallery)
+            if files:
+                results = [gr.File(file_count="multiple", label=name, visible=False)]
+            else:
+                results = [gr.Textbox(label=name if len(outputs) == 1 else f"{name}_{i}", visible=False) for i in range(len(outputs))]
+
+            def paths(memory):
+                return [path for path, _ in memory.items]
+
+            # Name the API parameters after the handler arguments, e.g. f15a_pro -> prompt
+            names = [NAMES.get(p.name.split("_", 1)[-1], p.name.split("_", 1)[-1])
+                     for p in inspect.signature(fn).parameters.values() if p.kind == p.POSITIONAL_OR_KEYWORD]
+            if len(names) < len(params):
+                names = ["image" if isinstance(p, gr.Image) else f"param_{i}" for i, p in enumerate(params)]
+            names = [n if names.count(n) == 1 else f"{n}_{i}" for i, n in enumerate(names[:len(params)])]
+
+            if inspect.isasyncgenfunction(fn):
+                async def call(*args):
+                    if limiter is not None:
+                        Admit(name, steps)(LocalContext.request.get(), *args)
+                    memory = History(1 << 16, 1 << 16)
+                    async for _ in fn(*args, memory):
+                        yield paths(memory)
+            else:
+                async def call(*args):
+                    if limiter is not None:
+                        Admit(name, steps)(LocalContext.request.get(), *args)
+                    if not stateful:
+                        return await fn(*args)
+                    memory = History(1 << 16, 1 << 16)
+                    await fn(*args, memory)
+                    return paths(memory)
+
+            call.__signature__ = inspect.Signature([inspect.Parameter(n, inspect.Parameter.POSITIONAL_OR_KEYWORD, default=p.value)
+                                                    for n, p in zip(names, params)])
+
+            gr.Button(visible=False).click(
+                show_progress='hidden',
+                fn=call,
+                inputs=params,
+                outputs=results,
+                api_name=name,
+                concurrency_id=name,
+                concurrency_limit=limits.get(name, limit)
+            )
+
         def ImageMask():
             return gr.ImageMask(
                             height="80%",
@@ -106,6 +461,18 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                             layers=False
                         )
         
+        def Refresh(revision):
+            # unchanged lists cost a revision comparison and no-op updates
+            if revision == options.revision:
+                return [revision] + [gr.update() for _ in dropdowns]
+            return [options.revision] + [gr.update(choices=getattr(options, name)) for _, name in dropdowns]
+
+        def Composite(editor):
+            # canvas previews are only refreshed when the canvas is closed, not on every stroke
+            if editor is None or editor.get("composite") is None:
+                return gr.update()
+            return editor["composite"]
+
         def truncate_prompt(prompt, max_length=50):
             if prompt is None or prompt == "":
                 return "No Prompt"
@@ -132,12 +499,20 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
 
             with gr.Tab("Image Generator"):
                 
-                def f15a_preprocess(f15a_pro, f15a_neg, f15a_mod, f15a_siz, f15a_svi, f15a_flux, f15a_sed, f15a_sty, f15a_ram):
+                async def f15a_generate(f15a_pro, f15a_neg, f15a_mod, f15a_siz, f15a_svi, f15a_flux, f15a_sed, f15a_sty):
                     caption = f"{truncate_prompt(f15a_pro)} | Model: {f15a_mod} | Size: {f15a_siz} | Style: {f15a_sty} | SVI LoRA: {f15a_svi} | Flux LoRA: {f15a_flux} | Seed: {f15a_sed}"
-                    results = sa.image_generate(f15a_pro, f15a_neg, f15a_mod, f15a_siz, f15a_svi, f15a_flux, f15a_sed, f15a_sty)
-                    if results is not None:
-                        f15a_ram.insert(0, (results, caption))
-                    return f15a_ram
+                    results = await Run("generate", prompt=f15a_pro, negative=f15a_neg, model=f15a_mod, size=f15a_siz,
+                                        lora_svi=f15a_svi, lora_flux=f15a_flux, seed=f15a_sed, style=f15a_sty)
+                    return results, caption
+
+                async def f15a_preprocess(f15a_pro, f15a_neg, f15a_mod, f15a_siz, f15a_svi, f15a_flux, f15a_sed, f15a_bat, f15a_sty, f15a_ram):
+                    # fixed seeds are swept, random (0) and CPU (-1) seeds are reused as-is
+                    seeds = [f15a_sed + i if f15a_sed > 0 else f15a_sed for i in range(max(1, int(f15a_bat or 1)))]
+                    for task in asyncio.as_completed([f15a_generate(f15a_pro, f15a_neg, f15a_mod, f15a_siz, f15a_svi, f15a_flux, seed, f15a_sty) for seed in seeds]):
+                        results, caption = await task
+                        if results is not None:
+                            f15a_ram.add((results, caption))
+                        yield f15a_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -154,7 +529,9 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                             f15a_svi = Dropdown(atr_lora_svi, atr_lora_svi[0], label="SVI LoRA")
                             f15a_flux = Dropdown(atr_lora_flux, atr_lora_flux[0], label="Flux LoRA")
                         
-                        f15a_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                        with gr.Row():
+                            f15a_sed = Number("Seed (0 Random | -1 CPU)", Default("generate", "seed"), -1, 1)
+                            f15a_bat = Slider(1, 8, 1, 1, "Batch Count")
 
                         Markdown("<center>Style Presets")
                         f15a_sty = Dropdown(sty_styles, sty_styles[0])
@@ -164,24 +541,23 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f15a_res = Gallery(885.938)
-                        f15a_ram = State([])
-                        f15a_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f15a_ram = Memory()
+                        Older(f15a_res, f15a_ram)
+                        Submit(f15a_sub, "generate",
                             fn=f15a_preprocess,
-                            inputs=[f15a_pro, f15a_neg, f15a_mod, f15a_siz, f15a_svi, f15a_flux, f15a_sed, f15a_sty, f15a_ram],
-                            outputs=[f15a_res]
-                        )    
+                            inputs=[f15a_pro, f15a_neg, f15a_mod, f15a_siz, f15a_svi, f15a_flux, f15a_sed, f15a_bat, f15a_sty, f15a_ram],
+                            outputs=[f15a_res],
+                            steps=lambda *args: ["generate"] * max(1, int(args[7] or 1))
+                        )
 
             with gr.Tab("Image Variation"):
-                def f15b_preprocess(f15b_img, f15b_pro, f15b_neg, f15b_mod, f15b_siz, f15b_gst, f15b_svi, f15b_flux, f15b_sed, f15b_sty, f15b_ram):
+                async def f15b_preprocess(f15b_img, f15b_pro, f15b_neg, f15b_mod, f15b_siz, f15b_gst, f15b_svi, f15b_flux, f15b_sed, f15b_sty, f15b_ram):
                     caption = f"{truncate_prompt(f15b_pro)} | Model: {f15b_mod} | Size: {f15b_siz} | Style: {f15b_sty}"
-                    results = sa.image_variation(f15b_img, f15b_pro, f15b_neg, f15b_mod, f15b_siz, 
-                                            f15b_gst, f15b_svi, f15b_flux, f15b_sed, f15b_sty)
+                    results = await Run("variation", image=f15b_img, prompt=f15b_pro, negative=f15b_neg, model=f15b_mod, size=f15b_siz,
+                                        strength=f15b_gst, lora_svi=f15b_svi, lora_flux=f15b_flux, seed=f15b_sed, style=f15b_sty)
                     if results is not None:
-                        f15b_ram.insert(0, (results, caption))
-                    return f15b_ram
+                        f15b_ram.add((results, caption))
+                    return f15b_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -201,7 +577,7 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                                 f15b_svi = Dropdown(atr_lora_svi, atr_lora_svi[0], label="SVI LoRA")
                                 f15b_flux = Dropdown(atr_lora_flux, atr_lora_flux[0], label="Flux LoRA")
                         
-                        f15b_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                        f15b_sed = Number("Seed (0 Random | -1 CPU)", Default("variation", "seed"), -1, 1)
 
                         Markdown("<center>Style Presets")
                         f15b_sty = Dropdown(sty_styles, sty_styles[0])
@@ -209,24 +585,22 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f15b_res = Gallery(961.344)
-                        f15b_ram = State([])
-                        f15b_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f15b_ram = Memory()
+                        Older(f15b_res, f15b_ram)
+                        Submit(f15b_sub, "variation",
                             fn=f15b_preprocess,
                             inputs=[f15b_img, f15b_pro, f15b_neg, f15b_mod, f15b_siz, f15b_gst, f15b_svi, f15b_flux, f15b_sed, f15b_sty, f15b_ram],
                             outputs=[f15b_res]
                         )
 
             with gr.Tab("Image Structure"):
-                def f15c_preprocess(f15c_img, f15c_pro, f15c_neg, f15c_mod, f15c_siz, f15c_gst, f15c_svi, f15c_sed, f15c_sty, f15c_ram):
+                async def f15c_preprocess(f15c_img, f15c_pro, f15c_neg, f15c_mod, f15c_siz, f15c_gst, f15c_svi, f15c_sed, f15c_sty, f15c_ram):
                     caption = f"{truncate_prompt(f15c_pro)} | Model: {f15c_mod} | Size: {f15c_siz} | Style: {f15c_sty}"
-                    results = sa.image_structure(f15c_img, f15c_pro, f15c_neg, f15c_mod, f15c_siz,
-                                            f15c_gst, f15c_svi, f15c_sed, f15c_sty)
+                    results = await Run("structure", image=f15c_img, prompt=f15c_pro, negative=f15c_neg, model=f15c_mod, size=f15c_siz,
+                                        strength=f15c_gst, lora_svi=f15c_svi, seed=f15c_sed, style=f15c_sty)
                     if results is not None:
-                        f15c_ram.insert(0, (results, caption))
-                    return f15c_ram
+                        f15c_ram.add((results, caption))
+                    return f15c_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -245,7 +619,7 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                                 f15c_gst = Dropdown(atr_g_structure, atr_g_structure[0], label="Guide Strength")
                                 f15c_svi = Dropdown(atr_lora_svi, atr_lora_svi[0], label="SVI LoRA")
                         
-                        f15c_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                        f15c_sed = Number("Seed (0 Random | -1 CPU)", Default("structure", "seed"), -1, 1)
 
                         Markdown("<center>Style Presets")
                         f15c_sty = Dropdown(sty_styles, sty_styles[0])
@@ -253,24 +627,22 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f15c_res = Gallery(961.344)
-                        f15c_ram = State([])
-                        f15c_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f15c_ram = Memory()
+                        Older(f15c_res, f15c_ram)
+                        Submit(f15c_sub, "structure",
                             fn=f15c_preprocess,
                             inputs=[f15c_img, f15c_pro, f15c_neg, f15c_mod, f15c_siz, f15c_gst, f15c_svi, f15c_sed, f15c_sty, f15c_ram],
                             outputs=[f15c_res]
                         )
 
             with gr.Tab("Image Facial"):
-                def f15d_preprocess(f15d_img, f15d_pro, f15d_neg, f15d_mod, f15d_siz, f15d_gst, f15d_svi, f15d_sed, f15d_sty, f15d_ram):
+                async def f15d_preprocess(f15d_img, f15d_pro, f15d_neg, f15d_mod, f15d_siz, f15d_gst, f15d_svi, f15d_sed, f15d_sty, f15d_ram):
                     caption = f"{truncate_prompt(f15d_pro)} | Model: {f15d_mod} | Size: {f15d_siz} | Style: {f15d_sty}"
-                    results = sa.image_facial(f15d_img, f15d_pro, f15d_neg, f15d_mod, f15d_siz,
-                                        f15d_gst, f15d_svi, f15d_sed, f15d_sty)
+                    results = await Run("facial", image=f15d_img, prompt=f15d_pro, negative=f15d_neg, model=f15d_mod, size=f15d_siz,
+                                        strength=f15d_gst, lora_svi=f15d_svi, seed=f15d_sed, style=f15d_sty)
                     if results is not None:
-                        f15d_ram.insert(0, (results, caption))
-                    return f15d_ram
+                        f15d_ram.add((results, caption))
+                    return f15d_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -289,7 +661,7 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                                 f15d_gst = Dropdown(atr_g_facial, atr_g_facial[0], label="Guide Strength")
                                 f15d_svi = Dropdown(atr_lora_svi, atr_lora_svi[0], label="SVI LoRA")
                         
-                        f15d_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                        f15d_sed = Number("Seed (0 Random | -1 CPU)", Default("facial", "seed"), -1, 1)
 
                         Markdown("<center>Style Presets")
                         f15d_sty = Dropdown(sty_styles, sty_styles[0])
@@ -297,24 +669,22 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f15d_res = Gallery(961.344)
-                        f15d_ram = State([])
-                        f15d_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f15d_ram = Memory()
+                        Older(f15d_res, f15d_ram)
+                        Submit(f15d_sub, "facial",
                             fn=f15d_preprocess,
                             inputs=[f15d_img, f15d_pro, f15d_neg, f15d_mod, f15d_siz, f15d_gst, f15d_svi, f15d_sed, f15d_sty, f15d_ram],
                             outputs=[f15d_res]
                         )
 
             with gr.Tab("Image Style"):
-                def f15e_preprocess(f15e_img, f15e_pro, f15e_neg, f15e_mod, f15e_siz, f15e_gst, f15e_svi, f15e_sed, f15e_sty, f15e_ram):
+                async def f15e_preprocess(f15e_img, f15e_pro, f15e_neg, f15e_mod, f15e_siz, f15e_gst, f15e_svi, f15e_sed, f15e_sty, f15e_ram):
                     caption = f"{truncate_prompt(f15e_pro)} | Model: {f15e_mod} | Size: {f15e_siz} | Style: {f15e_sty}"
-                    results = sa.image_style(f15e_img, f15e_pro, f15e_neg, f15e_mod, f15e_siz,
-                                        f15e_gst, f15e_svi, f15e_sed, f15e_sty)
+                    results = await Run("style", image=f15e_img, prompt=f15e_pro, negative=f15e_neg, model=f15e_mod, size=f15e_siz,
+                                        strength=f15e_gst, lora_svi=f15e_svi, seed=f15e_sed, style=f15e_sty)
                     if results is not None:
-                        f15e_ram.insert(0, (results, caption))
-                    return f15e_ram
+                        f15e_ram.add((results, caption))
+                    return f15e_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -333,7 +703,7 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                                 f15e_gst = Dropdown(atr_g_style, atr_g_style[0], label="Guide Strength")
                                 f15e_svi = Dropdown(atr_lora_svi, atr_lora_svi[0], label="SVI LoRA")
                         
-                        f15e_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                        f15e_sed = Number("Seed (0 Random | -1 CPU)", Default("style", "seed"), -1, 1)
 
                         Markdown("<center>Style Presets")
                         f15e_sty = Dropdown(sty_styles, sty_styles[0])
@@ -341,11 +711,9 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f15e_res = Gallery(961.344)
-                        f15e_ram = State([])
-                        f15e_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f15e_ram = Memory()
+                        Older(f15e_res, f15e_ram)
+                        Submit(f15e_sub, "style",
                             fn=f15e_preprocess,
                             inputs=[f15e_img, f15e_pro, f15e_neg, f15e_mod, f15e_siz, f15e_gst, f15e_svi, f15e_sed, f15e_sty, f15e_ram],
                             outputs=[f15e_res]
@@ -353,12 +721,13 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
 
             with gr.Tab("Image Controlnet"):
                 
-                def f2_preprocess(f2_img, f2_pro, f2_neg, f2_mod, f2_con, f2_str, f2_sca, f2_sed, f2_sty, f2_ram):
+                async def f2_preprocess(f2_img, f2_pro, f2_neg, f2_mod, f2_con, f2_str, f2_sca, f2_sed, f2_sty, f2_ram):
                     caption = f"{truncate_prompt(f2_pro)} | Model: {f2_mod} | Control: {f2_con} | Style: {f2_sty}"
-                    results = sa.image_controlnet(f2_img, f2_pro, f2_neg, f2_mod, f2_con, f2_str, f2_sca, f2_sed, f2_sty)
+                    results = await Run("controlnet", image=f2_img, prompt=f2_pro, negative=f2_neg, model=f2_mod, control=f2_con,
+                                        strength=f2_str, scale=f2_sca, seed=f2_sed, style=f2_sty)
                     if results is not None:
-                        f2_ram.insert(0, (results, caption))
-                    return f2_ram
+                        f2_ram.add((results, caption))
+                    return f2_ram.view()
 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -373,10 +742,10 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                             f2_mod = Dropdown(ime_remix_model, ime_remix_model[0], label="Model Selection")
                             f2_con = Dropdown(ime_controlnets, ime_controlnets[0], label="Control Type")
                         with gr.Row():
-                            f2_str = Slider(0, 100, 1, 70, "Controlnet Strength")
-                            f2_sca = Slider(3, 15, 0.5, 9, "Prompt Scale")
+                            f2_str = Slider(0, 100, 1, Default("controlnet", "strength"), "Controlnet Strength")
+                            f2_sca = Slider(3, 15, 0.5, Default("controlnet", "scale"), "Prompt Scale")
                             
-                        f2_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                        f2_sed = Number("Seed (0 Random | -1 CPU)", Default("controlnet", "seed"), -1, 1)
                         
                         Markdown("<center>Style Presets")
                         f2_sty = Dropdown(sty_styles, sty_styles[0])
@@ -384,46 +753,74 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f2_res = Gallery(898.344)
-                        f2_ram = State([])
+                        f2_ram = Memory()
+                        Older(f2_res, f2_ram)
                         
-                        f2_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        Submit(f2_sub, "controlnet",
                             fn=f2_preprocess,
                             inputs=[f2_img, f2_pro, f2_neg, f2_mod, f2_con, f2_str, f2_sca, f2_sed, f2_sty, f2_ram],
                             outputs=[f2_res]
-                        )    
+                        )
                         
             with gr.Tab("Image Toolkit"):
                 
-                def f4_preprocess(f4_img, f4_ram):
+                async def f4_preprocess(f4_img, f4_ram):
                     caption = "Upscaled Image"
-                    results = sa.image_upscale(f4_img)
+                    results = await Run("upscale", image=f4_img)
                     if results is not None:
-                        f4_ram.insert(0, (results, caption))
-                    return f4_ram
+                        f4_ram.add((results, caption))
+                    return f4_ram.view()
                 
-                def f4a_preprocess(f4_img, f4_ram):
+                async def f4a_preprocess(f4_img, f4_ram):
                     caption = "Restored Image"
-                    results = sa.face_codeformer(f4_img)
+                    results = await Run("restore", image=f4_img)
                     if results is not None:
-                        f4_ram.insert(0, (results, caption))
-                    return f4_ram
+                        f4_ram.add((results, caption))
+                    return f4_ram.view()
                 
-                def f5_preprocess(f4_img, f4_ram):
+                async def f5_preprocess(f4_img, f4_ram):
                     caption = "Background Removed"
-                    results = sa.image_bgremove(f4_img)
+                    results = await Run("bgremove", image=f4_img)
                     if results is not None:
-                        f4_ram.insert(0, (results, caption))
-                    return f4_ram
+                        f4_ram.add((results, caption))
+                    return f4_ram.view()
 
-                def f4d_preprocess(f4_img, f4d_typ, f4_ram):
+                async def f4d_preprocess(f4_img, f4d_typ, f4_ram):
                     caption = f"Face Restored | Model: {f4d_typ}"
-                    results = sa.face_gfpgan(f4_img, f4d_typ)
+                    results = await Run("gfpgan", image=f4_img, model=f4d_typ)
                     if results is not None:
-                        f4_ram.insert(0, (results, caption))
-                    return f4_ram
+                        f4_ram.add((results, caption))
+                    return f4_ram.view()
+
+                async def f4c_preprocess(f4_img):
+                    return await Run("caption", image=f4_img)
+
+                async def f4f_preprocess(f4_img):
+                    return await Run("prompt", image=f4_img)
+
+                async def f6_preprocess(f4_img):
+                    # Read-only tools share one event and run concurrently, repeats are served by the shared result cache
+                    return tuple(await asyncio.gather(Step("caption", image=f4_img), Step("prompt", image=f4_img)))
+
+                f4e_tools = {
+                    "restore":  ("Restore Image", lambda img, typ: {"image": img}),
+                    "upscale":  ("Upscale Image", lambda img, typ: {"image": img}),
+                    "bgremove": ("Remove Background", lambda img, typ: {"image": img}),
+                    "gfpgan":   ("Restore Face", lambda img, typ: {"image": img, "model": typ}),
+                }
+
+                async def f4e_preprocess(f4_img, f4e_ops, f4d_typ, f4_ram):
+                    # Every step runs on the result file of the previous one, without a round trip to the browser
+                    ops = f4e_ops or []
+                    caption = " > ".join(f4e_tools[op][0] for op in ops)
+                    results = f4_img if ops else None
+                    for n, op in enumerate(ops):
+                        results = await Step(op, n == len(ops) - 1, **f4e_tools[op][1](results, f4d_typ))
+                        if results is None:
+                            break
+                    if results is not None:
+                        f4_ram.add((results, caption))
+                    return f4_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -431,7 +828,7 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         f4_img = Image("Upload Image", ["upload"], 199)
                         
                         Markdown("<center>Face Restoration")
-                        f4d_typ = Dropdown(sa.list_atr_gfpgan, sa.list_atr_gfpgan[0], label="Model Selection")
+                        f4d_typ = Dropdown(atr_gfpgan, atr_gfpgan[0], label="Model Selection")
                         f4d_sub = Button("Restore Face", "stop")
                         
                         Markdown("<center>Available Tools")
@@ -440,75 +837,80 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         f4b_sub = Button("Restore Image")
                         f4c_sub = Button("Caption Image")
                         f6_sub = Button("Prompt Image")
+                        f6b_sub = Button("Analyze Image")
+
+                        Markdown("<center>Pipeline")
+                        f4e_ops = gr.Dropdown(choices=[(label, op) for op, (label, _) in f4e_tools.items()], value=["restore", "upscale"],
+                                              multiselect=True, label="Steps in Order")
+                        f4e_sub = Button("Run Pipeline", "stop")
 
                     with gr.Column(variant="panel", scale=3) as result:
-                        f4_ram = State([])
+                        f4_ram = Memory()
                         f4_res = Gallery(606.406)
+                        Older(f4_res, f4_ram)
                         f6_res = Textbox("Upload an image to get a caption...", 5, 5)
                         f6a_res = Textbox("Upload an image to get a prompt...", 5, 5)
                         
-                        f4a_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        Submit(f4a_sub, "upscale",
                             fn=f4_preprocess,
                             inputs=[f4_img, f4_ram],
-                            outputs=[f4_res] 
+                            outputs=[f4_res]
                         )
                         
-                        f4b_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        Submit(f4b_sub, "restore",
                             fn=f4a_preprocess,
                             inputs=[f4_img, f4_ram],
-                            outputs=[f4_res] 
+                            outputs=[f4_res]
                         )
                         
-                        f4c_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
-                            fn=sa.image_caption,
+                        Submit(f4c_sub, "caption",
+                            fn=f4c_preprocess,
                             inputs=[f4_img],
-                            outputs=[f6_res] 
-                        ) 
+                            outputs=[f6_res]
+                        )
                         
-                        f5_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        Submit(f5_sub, "bgremove",
                             fn=f5_preprocess,
                             inputs=[f4_img, f4_ram],
-                            outputs=[f4_res] 
+                            outputs=[f4_res]
                         )
                         
-                        f6_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
-                            fn=sa.image_prompt,
+                        Submit(f6_sub, "prompt",
+                            fn=f4f_preprocess,
                             inputs=[f4_img],
-                            outputs=[f6a_res] 
+                            outputs=[f6a_res]
                         )
                         
-                        f4d_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        Submit(f6b_sub, "analyze",
+                            fn=f6_preprocess,
+                            inputs=[f4_img],
+                            outputs=[f6_res, f6a_res],
+                            steps=lambda *_: ["caption", "prompt"]
+                        )
+                        
+                        Submit(f4d_sub, "gfpgan",
                             fn=f4d_preprocess,
                             inputs=[f4_img, f4d_typ, f4_ram],
                             outputs=[f4_res]
-                        )      
+                        )
+                        
+                        Submit(f4e_sub, "toolkit",
+                            fn=f4e_preprocess,
+                            inputs=[f4_img, f4e_ops, f4d_typ, f4_ram],
+                            outputs=[f4_res],
+                            steps=lambda f4_img, f4e_ops, *_: f4e_ops or []
+                        )
                 
             with gr.Tab("Image Enhance"):
                 
-                def f7_preprocess(f7_img, f7_pro, f7_neg, f7_cre, f7_rsm, f7_hdr, f7_sty, f7_ram):
+                async def f7_preprocess(f7_img, f7_pro, f7_neg, f7_cre, f7_rsm, f7_hdr, f7_sty, f7_ram):
+                    # Enhancement upscales, so the full-resolution source is sent unchanged
                     caption = f"{truncate_prompt(f7_pro)} | Creativity: {f7_cre:.2f} | Resemblance: {f7_rsm:.2f} | Style: {f7_sty}"
-                    results = sa.image_enhance(f7_img, f7_pro, f7_neg, f7_cre, f7_rsm, f7_hdr, f7_sty)
+                    results = await Run("enhance", image=f7_img, prompt=f7_pro, negative=f7_neg, creativity=f7_cre,
+                                        resemblance=f7_rsm, hdr=f7_hdr, style=f7_sty)
                     if results is not None:
-                        f7_ram.insert(0, (results, caption))
-                    return f7_ram
+                        f7_ram.add((results, caption))
+                    return f7_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -520,10 +922,10 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                     
                         Markdown("<center>Advanced Settings")
                         with gr.Row():
-                            f7_cre = Slider(0.2, 1.0, 0.05, 0.3, "Creativity Strength")
-                            f7_rsm = Slider(0.0, 1.0, 0.05, 1.0, "Resemblance Strength")
+                            f7_cre = Slider(0.2, 1.0, 0.05, Default("enhance", "creativity"), "Creativity Strength")
+                            f7_rsm = Slider(0.0, 1.0, 0.05, Default("enhance", "resemblance"), "Resemblance Strength")
                         with gr.Row():
-                            f7_hdr = Slider(0.0, 1.0, 0.05, 0.0, "HDR Strength")
+                            f7_hdr = Slider(0.0, 1.0, 0.05, Default("enhance", "hdr"), "HDR Strength")
                         
                         Markdown("<center>Style Presets")
                         f7_sty = Dropdown(sty_styles, sty_styles[0])
@@ -531,24 +933,22 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
 
                     with gr.Column(variant="panel", scale=3) as result:
                         f7_res = Gallery(885.938)
-                        f7_ram = State([])
-                        f7_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f7_ram = Memory()
+                        Older(f7_res, f7_ram)
+                        Submit(f7_sub, "enhance",
                             fn=f7_preprocess,
                             inputs=[f7_img, f7_pro, f7_neg, f7_cre, f7_rsm, f7_hdr, f7_sty, f7_ram],
                             outputs=[f7_res]
-                        )            
+                        )
                 
             with gr.Tab("Object Eraser"):
                 
-                def f8_preprocess(f8_mas, f8_ram):
+                async def f8_preprocess(f8_mas, f8_ram):
                     caption = f"Object Erased"
-                    results = sa.image_erase(f8_mas)
+                    results = await asa.image_erase(f8_mas)
                     if results is not None:
-                        f8_ram.insert(0, (results, caption))
-                    return f8_ram
+                        f8_ram.add((results, caption))
+                    return f8_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -557,32 +957,30 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         f8_img = Image("Canvas Image", [], 250)
                         with Modal(visible=False) as f8_m1:
                             f8_mas = ImageMask()
-                            f8_mas.change(fn=lambda x: x["composite"], inputs=f8_mas, outputs=f8_img)
-                            f8_clo = Button("Close Canvas").click(lambda: Modal(visible=False), None, f8_m1)
-                        f8_ope = Button("Open Canvas").click(lambda: Modal(visible=True), None, f8_m1)
+                            f8_clo = Button("Close Canvas").click(lambda x: (Modal(visible=False), Composite(x)), f8_mas, [f8_m1, f8_img], show_progress='hidden', show_api=False)
+                            f8_m1.blur(Composite, f8_mas, f8_img, show_progress='hidden', show_api=False)
+                        f8_ope = Button("Open Canvas").click(lambda: Modal(visible=True), None, f8_m1, show_api=False)
                     
                         f8_sub = Button("Erase Object", "stop")
                     
                     with gr.Column(variant="panel", scale=3) as result:
                         f8_res = Gallery(885.938)
-                        f8_ram = State([])
-                        f8_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f8_ram = Memory()
+                        Older(f8_res, f8_ram)
+                        Submit(f8_sub, "eraser",
                             fn=f8_preprocess,
                             inputs=[f8_mas, f8_ram],
                             outputs=[f8_res]
-                        ) 
+                        )
                                 
             with gr.Tab("Generative Fill"):
                 
-                def f9_preprocess(f9_mas, f9_pro, f9_sty, f9_ram):
+                async def f9_preprocess(f9_mas, f9_pro, f9_sty, f9_ram):
                     caption = f"{truncate_prompt(f9_pro)} | Style: {f9_sty}"
-                    results = sa.image_inpaint(f9_mas, f9_pro, None, f9_sty)
+                    results = await asa.image_inpaint(f9_mas, f9_pro, None, f9_sty)
                     if results is not None:
-                        f9_ram.insert(0, (results, caption))
-                    return f9_ram
+                        f9_ram.add((results, caption))
+                    return f9_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -592,9 +990,9 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         f9_img = Image("Canvas Image", [], 199)
                         with Modal(visible=False) as f9_m1:
                             f9_mas = ImageMask()
-                            f9_mas.change(fn=lambda x: x["composite"], inputs=f9_mas, outputs=f9_img)
-                            f9_clo = Button("Close Canvas").click(lambda: Modal(visible=False), None, f9_m1)
-                        f9_ope = Button("Open Canvas").click(lambda: Modal(visible=True), None, f9_m1)
+                            f9_clo = Button("Close Canvas").click(lambda x: (Modal(visible=False), Composite(x)), f9_mas, [f9_m1, f9_img], show_progress='hidden', show_api=False)
+                            f9_m1.blur(Composite, f9_mas, f9_img, show_progress='hidden', show_api=False)
+                        f9_ope = Button("Open Canvas").click(lambda: Modal(visible=True), None, f9_m1, show_api=False)
                         
                         f9_pro = Textbox("Prompt for image...")
 
@@ -604,11 +1002,9 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f9_res = Gallery(885.938)
-                        f9_ram = State([])
-                        f9_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f9_ram = Memory()
+                        Older(f9_res, f9_ram)
+                        Submit(f9_sub, "fill",
                             fn=f9_preprocess,
                             inputs=[f9_mas, f9_pro, f9_sty, f9_ram],
                             outputs=[f9_res]
@@ -616,12 +1012,12 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
 
             with gr.Tab("RT Generator"):
                 
-                def f10_preprocess(f10_pro, f10_neg, f10_siz, f10_lra, f10_sed, f10_sty, f10_ram):
+                async def f10_preprocess(f10_pro, f10_neg, f10_siz, f10_lra, f10_sed, f10_sty, f10_ram):
                     caption = f"{truncate_prompt(f10_pro)} | Size: {f10_siz} | LoRA: {f10_lra} | Style: {f10_sty}"
-                    results = sa.realtime_generate(f10_pro, f10_neg, f10_siz, f10_lra, f10_sed, f10_sty)
+                    results = await Run("realtime", prompt=f10_pro, negative=f10_neg, size=f10_siz, lora=f10_lra, seed=f10_sed, style=f10_sty)
                     if results is not None:
-                        f10_ram.insert(0, (results, caption))
-                    return f10_ram
+                        f10_ram.add((results, caption))
+                    return f10_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -635,19 +1031,23 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                             f10_lra = Dropdown(ime_lora, ime_lora[0], label="LoRA Model")
                             f10_siz = Dropdown(ime_size, ime_size[0], label="Image Size")
                         
-                        f10_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                        f10_sed = Number("Seed (0 Random | -1 CPU)", Default("realtime", "seed"), -1, 1)
                         
                         Markdown("<center>Style Presets")
                         f10_sty = Dropdown(sty_styles, sty_styles[0])
+                        f10_liv = Checkbox("Live Preview", False)
                         f10_sub = Button("Generate", "stop")
 
                     with gr.Column(variant="panel", scale=3) as result:
                         f10_res = Gallery(885.938)
-                        f10_ram = State([])
-                        f10_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f10_ram = Memory()
+                        Older(f10_res, f10_ram)
+                        Submit(f10_sub, "realtime",
+                            fn=f10_preprocess,
+                            inputs=[f10_pro, f10_neg, f10_siz, f10_lra, f10_sed, f10_sty, f10_ram],
+                            outputs=[f10_res]
+                        )
+                        Live(f10_liv, [f10_pro, f10_neg, f10_lra, f10_sed], "live",
                             fn=f10_preprocess,
                             inputs=[f10_pro, f10_neg, f10_siz, f10_lra, f10_sed, f10_sty, f10_ram],
                             outputs=[f10_res]
@@ -655,12 +1055,40 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
 
             with gr.Tab("RT Canvas"):
                 
-                def f11_preprocess(f11_img, f11_pro, f11_neg, f11_lra, f11_str, f11_sed, f11_sty, f11_ram):
+                async def f11_preprocess(f11_img, f11_pro, f11_neg, f11_lra, f11_str, f11_sed, f11_sty, f11_ram):
                     caption = f"{truncate_prompt(f11_pro)} | LoRA: {f11_lra} | Strength: {f11_str:.2f} | Style: {f11_sty}"
-                    results = sa.realtime_canvas(f11_img, f11_pro, f11_neg, f11_lra, f11_str, f11_sed, f11_sty)
+                    results = await Run("canvas", image=f11_img, prompt=f11_pro, negative=f11_neg, lora=f11_lra,
+                                        strength=f11_str, seed=f11_sed, style=f11_sty)
                     if results is not None:
-                        f11_ram.insert(0, (results, caption))
-                    return f11_ram
+                        f11_ram.add((results, caption))
+                    return f11_ram.view()
+
+                def f11_snapshot(image):
+                    path = os.path.join(cache_dir, "uploads", f"{digest(image)}.png")
+                    if not os.path.exists(path):
+                        os.makedirs(os.path.dirname(path), exist_ok=True)
+                        fd, temp = tempfile.mkstemp(".png", dir=os.path.dirname(path))
+                        os.close(fd)
+                        try:
+                            image.save(temp, "PNG")
+                            os.replace(temp, path)
+                        finally:
+                            if os.path.exists(temp):
+                                os.remove(temp)
+                    return path
+
+                async def f11_live(f11_can, f11_pro, f11_neg, f11_lra, f11_str, f11_sed, f11_sty, f11_last, f11_ram):
+                    # Skip strokes that leave the composite perceptually unchanged under the same settings
+                    image = Composite(f11_can)
+                    if not isinstance(image, PIL.Image.Image):
+                        return gr.update()
+                    key = await asa.local(dhash, image, 16)
+                    settings = (f11_pro, f11_neg, f11_lra, f11_str, f11_sed, f11_sty)
+                    if f11_last == [key, settings]:
+                        return gr.update()
+                    f11_last[:] = [key, settings]
+                    path = await asa.local(f11_snapshot, image)
+                    return await f11_preprocess(path, *settings, f11_ram)
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -670,9 +1098,9 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         f11_img = Image("Canvas Image", ['upload'], 199)
                         with Modal(visible=False) as f11_m1:
                             f11_can = Paint()
-                            f11_can.change(fn=lambda x: x["composite"], inputs=f11_can, outputs=f11_img)
-                            f11_clo = Button("Close Canvas").click(lambda: Modal(visible=False), None, f11_m1)
-                        f11_ope = Button("Open Canvas").click(lambda: Modal(visible=True), None, f11_m1)
+                            f11_clo = Button("Close Canvas").click(lambda x: (Modal(visible=False), Composite(x)), f11_can, [f11_m1, f11_img], show_progress='hidden', show_api=False)
+                            f11_m1.blur(Composite, f11_can, f11_img, show_progress='hidden', show_api=False)
+                        f11_ope = Button("Open Canvas").click(lambda: Modal(visible=True), None, f11_m1, show_api=False)
                         
                         f11_pro = Textbox("Prompt for image...", lines=1)
                         f11_neg = Textbox("Negative prompt...", lines=1)
@@ -680,35 +1108,42 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         Markdown("<center>Advanced Settings")
                         with gr.Row():
                             f11_lra = Dropdown(ime_lora, ime_lora[0], label="LoRA Model")
-                            f11_str = Slider(0.0, 1.0, 0.1, 1, "Creativity Strength")
+                            f11_str = Slider(0.0, 1.0, 0.1, Default("canvas", "strength"), "Creativity Strength")
                         
-                        f11_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                        f11_sed = Number("Seed (0 Random | -1 CPU)", Default("canvas", "seed"), -1, 1)
                         
                         Markdown("<center>Style Presets")
                         f11_sty = Dropdown(sty_styles, sty_styles[0])
+                        f11_liv = Checkbox("Live Canvas", False)
                         f11_sub = Button("Generate", "stop")
                     
                     with gr.Column(variant="panel", scale=3) as result:
                         f11_res = Gallery(885.938)
-                        f11_ram = State([])
+                        f11_ram = Memory()
+                        Older(f11_res, f11_ram)
                         
-                        f11_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        Submit(f11_sub, "canvas",
                             fn=f11_preprocess,
                             inputs=[f11_img, f11_pro, f11_neg, f11_lra, f11_str, f11_sed, f11_sty, f11_ram],
                             outputs=[f11_res]
-                        )  
+                        )
+                        Live(f11_liv, [f11_can.change], "live_canvas",
+                            fn=f11_live,
+                            inputs=[f11_can, f11_pro, f11_neg, f11_lra, f11_str, f11_sed, f11_sty, State([None, None]), f11_ram],
+                            outputs=[f11_res],
+                            delay=0.15,
+                            interval=1.0
+                        )
             
             with gr.Tab("Image Consistency"):
                 
-                def f13_preprocess(f13_fce, f13_stl, f13_pro, f13_neg, f13_siz, f13_fco, f13_sst, f13_sed, f13_sty, f13_ram):
+                async def f13_preprocess(f13_fce, f13_stl, f13_pro, f13_neg, f13_siz, f13_fco, f13_sst, f13_sed, f13_sty, f13_ram):
                     caption = f"{truncate_prompt(f13_pro)} | Size: {f13_siz} | Face: {f13_fco:.2f} | Style: {f13_sst:.2f}"
-                    results = sa.image_consistent(f13_pro, f13_fce, f13_stl, f13_neg, f13_siz, f13_fco, f13_sst, f13_sed, f13_sty)
+                    results = await Run("consistency", prompt=f13_pro, face=f13_fce, style_image=f13_stl, negative=f13_neg, size=f13_siz,
+                                        face_strength=f13_fco, style_strength=f13_sst, seed=f13_sed, style=f13_sty)
                     if results is not None:
-                        f13_ram.insert(0, (results, caption))
-                    return f13_ram
+                        f13_ram.add((results, caption))
+                    return f13_ram.view()
                         
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -723,10 +1158,10 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         Markdown("<center>Advanced Settings")
                         with gr.Row():
                             f13_siz = Dropdown(ime_size, ime_size[0], label="Image Size")
-                            f13_fco = Slider(0, 2, 0.05, 1.2, "Face Strength")
+                            f13_fco = Slider(0, 2, 0.05, Default("consistency", "face_strength"), "Face Strength")
                         with gr.Row():
-                            f13_sst = Slider(0, 1, 0.05, 0.7, "Style Strength")
-                            f13_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                            f13_sst = Slider(0, 1, 0.05, Default("consistency", "style_strength"), "Style Strength")
+                            f13_sed = Number("Seed (0 Random | -1 CPU)", Default("consistency", "seed"), -1, 1)
 
                         Markdown("<center>Style Presets")
                         f13_sty = Dropdown(sty_styles, sty_styles[0])
@@ -734,11 +1169,9 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f13_res = Gallery(885.938)
-                        f13_ram = State([])
-                        f13_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f13_ram = Memory()
+                        Older(f13_res, f13_ram)
+                        Submit(f13_sub, "consistency",
                             fn=f13_preprocess,
                             inputs=[f13_fce, f13_stl, f13_pro, f13_neg, f13_siz, f13_fco, f13_sst, f13_sed, f13_sty, f13_ram],
                             outputs=[f13_res]
@@ -746,12 +1179,13 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
 
             with gr.Tab("Face Identity"):
                 
-                def f14_preprocess(f14_fce, f14_pro, f14_neg, f14_siz, f14_fco, f14_sed, f14_sty, f14_ram):
+                async def f14_preprocess(f14_fce, f14_pro, f14_neg, f14_siz, f14_fco, f14_sed, f14_sty, f14_ram):
                     caption = f"{truncate_prompt(f14_pro)} | Size: {f14_siz} | Face: {f14_fco:.2f} | Style: {f14_sty}"
-                    results = sa.face_identity(f14_fce, f14_pro, f14_neg, f14_siz, f14_fco, f14_sed, f14_sty)
+                    results = await Run("identity", face=f14_fce, prompt=f14_pro, negative=f14_neg, size=f14_siz,
+                                        face_strength=f14_fco, seed=f14_sed, style=f14_sty)
                     if results is not None:
-                        f14_ram.insert(0, (results, caption))
-                    return f14_ram
+                        f14_ram.add((results, caption))
+                    return f14_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -764,9 +1198,9 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         Markdown("<center>Advanced Settings")
                         with gr.Row():
                             f14_siz = Dropdown(ime_size, ime_size[0], label="Image Size")
-                            f14_fco = Slider(0, 1, 0.05, 1.0, "Face Consistency")
+                            f14_fco = Slider(0, 1, 0.05, Default("identity", "face_strength"), "Face Consistency")
                         
-                        f14_sed = Number("Seed (0 Random | -1 CPU)", 0, -1, 1)
+                        f14_sed = Number("Seed (0 Random | -1 CPU)", Default("identity", "seed"), -1, 1)
 
                         Markdown("<center>Style Presets")
                         f14_sty = Dropdown(sty_styles, sty_styles[0])
@@ -774,23 +1208,21 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f14_res = Gallery(885.938)
-                        f14_ram = State([])
-                        f14_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f14_ram = Memory()
+                        Older(f14_res, f14_ram)
+                        Submit(f14_sub, "identity",
                             fn=f14_preprocess,
                             inputs=[f14_fce, f14_pro, f14_neg, f14_siz, f14_fco, f14_sed, f14_sty, f14_ram],
                             outputs=[f14_res]
-                        )    
+                        )
                         
             with gr.Tab("Image Outpaint"):
-                def f12_preprocess(f12_img, f12_siz, f12_ram):
+                async def f12_preprocess(f12_img, f12_siz, f12_ram):
                     caption = f"Image Outpaint | Size: {f12_siz}"
-                    results = sa.image_outpaint(f12_img, f12_siz)
+                    results = await Run("outpaint", image=f12_img, size=f12_siz)
                     if results is not None:
-                        f12_ram.insert(0, (results, caption))
-                    return f12_ram
+                        f12_ram.add((results, caption))
+                    return f12_ram.view()
                 
                 with gr.Row(equal_height=False):
                     with gr.Column(variant="panel", scale=1) as menu:
@@ -804,11 +1236,9 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
                         
                     with gr.Column(variant="panel", scale=3) as result:
                         f12_res = Gallery(885.938)
-                        f12_ram = State([])
-                        f12_sub.click(
-                            show_progress='minimal',
-                            show_api=False,
-                            scroll_to_output=True,
+                        f12_ram = Memory()
+                        Older(f12_res, f12_ram)
+                        Submit(f12_sub, "outpaint",
                             fn=f12_preprocess,
                             inputs=[f12_img, f12_siz, f12_ram],
                             outputs=[f12_res]
@@ -816,14 +1246,39 @@ def AtelierWebUI(client, address: str = None, port: int = None, browser: bool =
             
             Markdown("<center>Atelier can make mistakes. Check important info. Request errors will return None.")
 
+            demo.unload(Close)
+
+            if refresh > 0:
+                revision = State(built)
+                demo.load(
+                    show_progress='hidden',
+                    show_api=False,
+                    fn=Refresh,
+                    inputs=[revision],
+                    outputs=[revision] + [dropdown for dropdown, _ in dropdowns],
+                    every=refresh
+                )
+
         demo.launch(
             server_name=address,
             server_port=port,
             inbrowser=browser,
             max_file_size=upload_size,
             share=public,
-            quiet=True
+            quiet=True,
+            show_api=api,
+            allowed_paths=[cache_dir],
+            prevent_thread_lock=True
         )
+
+        mount(demo.app)
+
+        if metrics:
+            demo.app.add_api_route("/metrics", lambda: PlainTextResponse(meter.render()), methods=["GET"])
+        if usage and limiter is not None:
+            demo.app.add_api_route("/usage", limiter.usage, methods=["GET"])
+
+        demo.block_thread()
         
     except Exception as e:
         client.logger.error(f"Startup error: {e}")
\ No newline at end of file
@@ -0,0 +1,162 @@
+import os
+import time
+import asyncio
+import inspect
+import functools
+import contextlib
+from contextvars import ContextVar
+from concurrent.futures import ThreadPoolExecutor
+from .cache import digest
+from .metrics import Metrics
+from .proxy import ClientProxy, deterministic
+from .thumbnails import Thumbnails
+from .scheduler import FairScheduler, current, status
+
+# Whether results of the event currently being handled get a gallery preview
+preview = ContextVar("atelier_preview", default=True)
+
+class AsyncClient:
+    """
+    Awaitable view of an Atelier client.
+
+    Coroutine methods of the client are awaited directly. Blocking methods are
+    offloaded to a dedicated I/O pool, so Gradio handlers can await upstream
+    calls on the event loop instead of holding one of its worker threads.
+    Local image work goes through a separate CPU pool via `local`. Calls of an
+    endpoint with a limit wait for one of its slots, whichever event they
+    belong to, e.g. the steps of a pipeline.
+
+    Identical deterministic calls that are still in flight are coalesced:
+    every caller awaits the same upstream call and receives its result. Calls
+    with a random (0) or CPU (-1) seed always go upstream on their own. Hits
+    of the result cache of a ClientProxy return without waiting for an
+    endpoint limit, a scheduler slot or an I/O thread.
+
+    Parameters:
+    - client (Client): Atelier Client instance (or proxy)
+    - workers (int): Maximum number of blocking upstream calls in flight
+    - scheduler (FairScheduler): Scheduler deciding the order of upstream calls
+    - metrics (Metrics): Receives queue wait, upstream latency and error metrics
+    - thumbnails (Thumbnails): Creates previews of image results in the CPU pool
+    - limits (dict): Per-endpoint limits of concurrent upstream calls, e.g. {"upscale": 2}
+    """
+    def __init__(self, client, workers: int = 64, scheduler: FairScheduler = None, metrics: Metrics = None,
+                 thumbnails: Thumbnails = None, limits: dict = None):
+        self.client = client
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.thumbnails = thumbnails
+        self.limits = limits or {}
+        self.semaphores = {}
+        self.waiting = {}
+        self.inflight = {}
+        self.latency = {}
+        self.io = ThreadPoolExecutor(max(1, workers), thread_name_prefix="atelier-io")
+        self.cpu = ThreadPoolExecutor(os.cpu_count() or 1, thread_name_prefix="atelier-cpu")
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def call(*args):
+            if not deterministic(name, args):
+                return await self._schedule(attr, *args)
+            key, results = await self.local(self._lookup, name, args)
+            if results is not None:
+                return await self._preview(results)
+            shared = self.inflight.get(key)
+            if shared is None:
+                shared = self.inflight[key] = asyncio.ensure_future(self._schedule(attr, *args))
+                shared.add_done_callback(lambda _: self.inflight.pop(key, None))
+            return await asyncio.shield(shared)
+        return call
+
+    async def _schedule(self, attr, *args):
+        queued = time.perf_counter()
+        async with self._limit(current.get()[0]):
+            if self.scheduler is None:
+                results = await self._measure(attr, queued, *args)
+            else:
+                async with self.scheduler.slot(*current.get()):
+                    results = await self._measure(attr, queued, *args)
+        return await self._preview(results)
+
+    def _lookup(self, name: str, args: tuple):
+        """Return the coalescing key of a deterministic call and its cached results, or None."""
+        key = digest(name, *args)
+        cache = self.client.cache if isinstance(self.client, ClientProxy) else None
+        return key, cache.get(key) if cache is not None else None
+
+    async def _preview(self, results):
+        if self.thumbnails is not None and preview.get() and isinstance(results, str):
+            await self.local(self.thumbnails.make, results)
+        return results
+
+    @contextlib.asynccontextmanager
+    async def _limit(self, endpoint: str):
+        """Hold one slot of the endpoint limit, if the endpoint has one, for the duration of the block."""
+        if endpoint not in self.limits:
+            yield
+            return
+        semaphore = self.semaphores.get(endpoint)
+        if semaphore is None:
+            semaphore = self.semaphores[endpoint] = asyncio.Semaphore(max(1, self.limits[endpoint]))
+        if semaphore.locked():
+            # Report the position among the calls waiting for the endpoint, like the scheduler does
+            waiting = self.waiting.setdefault(endpoint, [])
+            entry = object()
+            waiting.append(entry)
+            state = status.get()
+            if state is not None:
+                state["ahead"] = lambda: waiting.index(entry) if entry in waiting else 0
+            try:
+                await semaphore.acquire()
+            finally:
+                waiting.remove(entry)
+                if state is not None:
+                    state["ahead"] = None
+        else:
+            await semaphore.acquire()
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+    async def _measure(self, attr, queued: float, *args):
+        endpoint = current.get()[0]
+        start = time.perf_counter()
+        state = status.get()
+        if state is not None:
+            state["endpoint"], state["started"] = endpoint, start
+        if self.metrics is not None:
+            self.metrics.observe("upstream_wait_seconds", start - queued, endpoint=endpoint)
+        results, raised = None, True
+        try:
+            results = await self._call(attr, *args)
+            raised = False
+            return results
+        finally:
+            elapsed = time.perf_counter() - start
+            # Only upstream calls reach this point, cache hits return in `call`
+            if results is not None:
+                self.latency[endpoint] = elapsed + 0.8 * (self.latency.get(endpoint, elapsed) - elapsed)
+            if self.metrics is not None:
+                self.metrics.observe("upstream_seconds", elapsed, endpoint=endpoint)
+                # Exceptions fail the handler, which counts them
+                if results is None and not raised:
+                    self.metrics.inc("errors_total", endpoint=endpoint)
+
+    async def _call(self, attr, *args):
+        if inspect.iscoroutinefunction(attr):
+            return await attr(*args)
+        return await asyncio.get_running_loop().run_in_executor(self.io, functools.partial(attr, *args))
+
+    def estimate(self, endpoint: str):
+        """Return the rolling average upstream latency of an endpoint in seconds, or None."""
+        return self.latency.get(endpoint)
+
+    async def local(self, fn, *args):
+        """Run CPU-bound local work such as image processing in the CPU pool."""
+        return await asyncio.get_running_loop().run_in_executor(self.cpu, functools.partial(fn, *args))
@@ -0,0 +1,50 @@
+import os
+import re
+import hashlib
+from importlib import resources
+from fastapi import HTTPException
+from fastapi.responses import FileResponse
+
+FAMILY = "Nokia Sans S60 Regular"
+FONTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+ROUTE = "atelier/fonts"
+FORMATS = {".woff2": "woff2", ".woff": "woff", ".ttf": "truetype", ".otf": "opentype"}
+
+def minify(css: str):
+    """Strip comments and insignificant whitespace from a stylesheet."""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{}:;,>])\s*", r"\1", css)
+    return css.replace(";}", "}").strip()
+
+def fonts():
+    """Return {content hash: path} of the font files bundled in the `fonts` directory."""
+    found = {}
+    if os.path.isdir(FONTS):
+        for name in sorted(os.listdir(FONTS)):
+            if os.path.splitext(name)[1].lower() in FORMATS:
+                path = os.path.join(FONTS, name)
+                with open(path, "rb") as f:
+                    found[hashlib.sha256(f.read()).hexdigest()[:16]] = path
+    return found
+
+def font_face(files: dict):
+    """Return the @font-face rule for FAMILY: installed copies first, then bundled files."""
+    sources = [f'local("{FAMILY}")', 'local("NokiaSansS60-Regular")']
+    for key, path in files.items():
+        name = os.path.basename(path)
+        sources.append(f'url("{ROUTE}/{key}/{name}") format("{FORMATS[os.path.splitext(name)[1].lower()]}")')
+    return f'@font-face {{ font-family: "{FAMILY}"; src: {", ".join(sources)}; font-display: swap; }}\n'
+
+def mount(app):
+    """Serve the bundled fonts under content-hashed URLs with immutable cache headers."""
+    def font(key: str, name: str):
+        path = FILES.get(key)
+        if path is None or os.path.basename(path) != name:
+            raise HTTPException(status_code=404)
+        return FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+    app.add_api_route(f"/{ROUTE}/{{key}}/{{name}}", font, methods=["GET"])
+
+FILES = fonts()
+# Read once at import. Gradio inlines the stylesheet into the page config.
+CSS = minify(font_face(FILES) + resources.read_text(__package__, "__4.38.1__.py"))
@@ -0,0 +1,114 @@
+import os
+import sys
+import csv
+import json
+import shutil
+import asyncio
+import argparse
+import tempfile
+from .aio import AsyncClient
+from .cache import ResultCache
+from .proxy import ClientProxy
+from .uploads import Uploads
+from .pipelines import PIPELINES
+
+def read_manifest(path: str):
+    """Yield jobs from a JSONL or CSV manifest. Every job gets an `id`, defaulting to its line number."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = ({k: v for k, v in row.items() if v not in (None, "")} for row in csv.DictReader(f))
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for n, job in enumerate(rows, 1):
+            job.setdefault("id", str(n))
+            yield job
+
+def read_done(path: str):
+    """Return the ids of the jobs that already succeeded in an output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("result") is not None:
+                done.add(str(record["id"]))
+    return done
+
+async def run(client, manifest: str, output: str, workers: int = 8, directory: str = None,
+              resume: bool = True, cache_dir: str = None):
+    """
+    Run every job of a manifest through the same pipelines as the web interface.
+
+    Parameters:
+    - client (Client): Atelier Client instance
+    - manifest (str): JSONL or CSV file of jobs with a `pipeline` field and its parameters
+    - output (str): JSONL file receiving one record per finished job as it completes
+    - workers (int): Maximum number of jobs in flight
+    - directory (str): Copy result files into this directory
+    - resume (bool): Skip jobs that already succeeded in `output`
+    - cache_dir (str): Directory for prepared uploads
+    """
+    cache_dir = cache_dir or os.path.join(tempfile.gettempdir(), "atelier-webui")
+    asa = AsyncClient(ClientProxy(client, ResultCache()), workers)
+    uploads = Uploads(os.path.join(cache_dir, "uploads"))
+    done = read_done(output) if resume else set()
+    slots = asyncio.Semaphore(workers)
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    with open(output, "a" if resume else "w", encoding="utf-8") as out:
+        async def attempt(record):
+            try:
+                pipeline = PIPELINES.get(record.get("pipeline"))
+                if pipeline is None:
+                    raise ValueError(f"Unknown pipeline: {record.get('pipeline')}")
+                values = {k: v for k, v in record.items() if k not in ("id", "pipeline")}
+                result = await pipeline.run(asa, values, client, uploads)
+                if result is not None and directory and isinstance(result, str) and os.path.isfile(result):
+                    os.makedirs(directory, exist_ok=True)
+                    result = shutil.copy(result, os.path.join(directory, f"{record['id']}{os.path.splitext(result)[1]}"))
+                return result, None if result is not None else "Request error returned None"
+            except Exception as e:
+                return None, str(e)
+
+        async def job(record):
+            try:
+                result, error = await attempt(record)
+                counts["ok" if error is None else "failed"] += 1
+                out.write(json.dumps({"id": record["id"], "pipeline": record.get("pipeline"), "result": result, "error": error}) + "\n")
+                out.flush()
+            finally:
+                slots.release()
+
+        tasks = set()
+        for record in read_manifest(manifest):
+            if str(record["id"]) in done:
+                counts["skipped"] += 1
+                continue
+            await slots.acquire()
+            task = asyncio.ensure_future(job(record))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+    return counts
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(prog="atelier-batch", description="Run Atelier pipelines from a JSONL or CSV manifest")
+    parser.add_argument("manifest", help="JSONL or CSV file of jobs, each with a 'pipeline' field: " + ", ".join(PIPELINES))
+    parser.add_argument("-o", "--output", default="results.jsonl", help="JSONL file receiving one record per job")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="maximum number of jobs in flight")
+    parser.add_argument("-d", "--directory", default=None, help="copy result files into this directory")
+    parser.add_argument("--restart", action="store_true", help="ignore previous results in the output file")
+    args = parser.parse_args(argv)
+
+    from atelier_client import AtelierClient
+    counts = asyncio.run(run(AtelierClient(), args.manifest, args.output, args.workers, args.directory, not args.restart))
+    print(f"{counts['ok']} succeeded, {counts['failed']} failed, {counts['skipped']} skipped", file=sys.stderr)
+    return 1 if counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
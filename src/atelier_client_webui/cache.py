@@ -0,0 +1,114 @@
+import os
+import time
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+
+@functools.lru_cache(maxsize=4096)
+def _file(path: str, mtime: int, size: int):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+def digest(*args):
+    """
+    Return a content hash for a list of call arguments.
+
+    Strings that point to existing files are hashed by their bytes, PIL images
+    by their pixels, and everything else by its representation. File hashes
+    are memoized by path, modification time and size.
+    """
+    h = hashlib.sha256()
+    for arg in args:
+        if isinstance(arg, str) and os.path.isfile(arg):
+            stat = os.stat(arg)
+            h.update(b"file:")
+            h.update(_file(arg, stat.st_mtime_ns, stat.st_size))
+        elif hasattr(arg, "tobytes") and hasattr(arg, "size"):
+            h.update(f"image:{arg.mode}:{arg.size}:".encode())
+            h.update(arg.tobytes())
+        elif isinstance(arg, dict):
+            h.update(b"dict:")
+            h.update(digest(*sorted(arg.items(), key=lambda x: str(x[0]))).encode())
+        elif isinstance(arg, (list, tuple)):
+            h.update(b"list:")
+            h.update(digest(*arg).encode())
+        else:
+            h.update(repr(arg).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+def dhash(image, size: int = 8):
+    """
+    Return the difference hash and the coarse mean level of every color band of
+    a PIL image. Perceptually identical images have equal hashes, recolored or
+    refilled ones do not.
+    """
+    hashes = []
+    for band in image.convert("RGB").resize((size + 1, size)).split():
+        pixels = list(band.getdata())
+        bits = 0
+        for row in range(size):
+            for col in range(size):
+                bits = bits << 1 | (pixels[row * (size + 1) + col] > pixels[row * (size + 1) + col + 1])
+        hashes.append((bits, sum(pixels) // len(pixels) >> 4))
+    return tuple(hashes)
+
+class ResultCache:
+    """
+    Thread-safe LRU cache for client results shared across sessions.
+
+    Parameters:
+    - size (int): Size budget in bytes of the cached results
+    - ttl (float): Time to live of an entry in seconds
+    """
+    def __init__(self, size: int = 256 << 20, ttl: float = 3600):
+        self.size = size
+        self.ttl = ttl
+        self.used = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return the cached result for `key` or None."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires = entry
+            if expires < time.monotonic() or not self._alive(value):
+                self._drop(key)
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value):
+        """Store a result under `key`, evicting the least recently used entries."""
+        if value is None or self.size <= 0:
+            return
+        size = self._sizeof(value)
+        if size > self.size:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (value, size, time.monotonic() + self.ttl)
+            self.used += size
+            while self.used > self.size:
+                self._drop(next(iter(self.entries)))
+
+    def _drop(self, key: str):
+        self.used -= self.entries.pop(key)[1]
+
+    @staticmethod
+    def _alive(value):
+        return not isinstance(value, str) or not os.path.isabs(value) or os.path.exists(value)
+
+    @staticmethod
+    def _sizeof(value):
+        if isinstance(value, str) and os.path.isfile(value):
+            return os.path.getsize(value)
+        return len(repr(value))
@@ -0,0 +1,110 @@
+import os
+import json
+import mmap
+import struct
+import uuid
+
+class History:
+    """
+    Bounded gallery history for a single session.
+
+    The newest `cap` items are kept in memory. Older items are spilled to an
+    append-only file on disk, indexed by a memory-mapped table of offsets, and
+    are only read back when the user pages past the in-memory items.
+
+    Parameters:
+    - cap (int): Maximum number of items kept in memory
+    - page (int): Number of items sent to the gallery per page
+    - directory (str): Directory for spilled items
+    - files (TempFiles): Keeps the result and spill files of the history from being removed
+    """
+    _offset = struct.Struct("<Q")
+
+    def __init__(self, cap: int = 50, page: int = 12, directory: str = None, files=None):
+        self.cap = max(1, int(cap))
+        self.page = max(1, int(page))
+        self.directory = directory
+        self.files = files
+        self.items = []
+        self.pages = 1
+        self.spilled = 0
+        self.path = None
+
+    def __len__(self):
+        return len(self.items) + self.spilled
+
+    def __deepcopy__(self, memo):
+        # Every session starts from a copy of the default history and shares its file manager
+        history = History(self.cap, self.page, self.directory, self.files)
+        for item in reversed(self.items):
+            history.add(item)
+        return history
+
+    def add(self, item):
+        """Insert a new (result, caption) item and return the first page."""
+        self.items.insert(0, tuple(item))
+        if self.files is not None:
+            self.files.retain(item[0])
+        while len(self.items) > self.cap:
+            self._spill(self.items.pop())
+        self.pages = 1
+        return self.view()
+
+    def more(self):
+        """Extend the view by one page and return it."""
+        if self.pages * self.page < len(self):
+            self.pages += 1
+        return self.view()
+
+    def view(self):
+        """Return the items currently visible in the gallery, newest first."""
+        count = min(self.pages * self.page, len(self))
+        view = self.items[:count]
+        if count > len(self.items):
+            view.extend(self._load(count - len(self.items)))
+        return view
+
+    def close(self):
+        """Release the result files and remove the spill files of this history."""
+        if self.files is not None:
+            for path, _ in self.items + (self._load(self.spilled) if self.path is not None else []):
+                self.files.release(path)
+        if self.path is not None:
+            for path in (self.path + ".jsonl", self.path + ".idx"):
+                if self.files is not None:
+                    self.files.release(path)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self.items, self.spilled, self.path = [], 0, None
+
+    def _spill(self, item):
+        if self.path is None:
+            directory = self.directory or os.path.join(os.getcwd(), ".history")
+            os.makedirs(directory, exist_ok=True)
+            self.path = os.path.join(directory, uuid.uuid4().hex)
+            if self.files is not None:
+                self.files.retain(self.path + ".jsonl")
+                self.files.retain(self.path + ".idx")
+        with open(self.path + ".jsonl", "ab") as data:
+            offset = data.tell()
+            data.write(json.dumps(list(item)).encode() + b"\n")
+        with open(self.path + ".idx", "ab") as index:
+            index.write(self._offset.pack(offset))
+        self.spilled += 1
+
+    def _load(self, count: int):
+        count = min(count, self.spilled)
+        if count <= 0:
+            return []
+        items = []
+        size = self._offset.size
+        with open(self.path + ".idx", "rb") as index, open(self.path + ".jsonl", "rb") as data:
+            with mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ) as offsets, \
+                 mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ) as lines:
+                for n in range(self.spilled - 1, self.spilled - 1 - count, -1):
+                    start = self._offset.unpack_from(offsets, n * size)[0]
+                    end = lines.find(b"\n", start)
+                    items.append(tuple(json.loads(lines[start:end])))
+        return items
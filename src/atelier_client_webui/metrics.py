@@ -0,0 +1,83 @@
+import bisect
+import threading
+from collections import defaultdict
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+class Metrics:
+    """
+    Per-endpoint counters, gauges and histograms rendered in the Prometheus
+    text exposition format.
+
+    Parameters:
+    - prefix (str): Prefix of every metric name
+    """
+    HELP = {
+        "requests_total":        ("counter",   "Handled requests per endpoint"),
+        "errors_total":          ("counter",   "Requests that raised and upstream calls that returned None"),
+        "in_flight":             ("gauge",     "Requests currently being handled"),
+        "queue_wait_seconds":    ("histogram", "Time between joining the Gradio queue and the handler starting"),
+        "upstream_wait_seconds": ("histogram", "Time spent waiting for an endpoint limit and fair scheduler slot"),
+        "upstream_seconds":      ("histogram", "Time spent in upstream client calls"),
+        "handler_seconds":       ("histogram", "Total handler time including local processing"),
+    }
+
+    def __init__(self, prefix: str = "atelier"):
+        self.prefix = prefix
+        self.help = dict(self.HELP)
+        self.values = defaultdict(float)
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, text: str):
+        """Register an additional metric so it is rendered with its help text."""
+        self.help[name] = (kind, text)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """Add `value` to a counter or gauge."""
+        with self.lock:
+            self.values[(name, self._labels(labels))] += value
+
+    def set(self, name: str, value: float, **labels):
+        """Set a gauge to `value`."""
+        with self.lock:
+            self.values[(name, self._labels(labels))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record `value` in a histogram."""
+        with self.lock:
+            key = (name, self._labels(labels))
+            counts, total = self.histograms.get(key, ([0] * (len(BUCKETS) + 1), 0.0))
+            counts[bisect.bisect_left(BUCKETS, value)] += 1
+            self.histograms[key] = (counts, total + value)
+
+    def render(self):
+        """Return every metric in the Prometheus text format."""
+        lines = []
+        with self.lock:
+            for name, (kind, text) in self.help.items():
+                full = f"{self.prefix}_{name}"
+                values = [(k[1], v) for k, v in self.values.items() if k[0] == name]
+                histograms = [(k[1], v) for k, v in self.histograms.items() if k[0] == name]
+                lines.append(f"# HELP {full} {text}")
+                lines.append(f"# TYPE {full} {kind}")
+                for labels, value in sorted(values):
+                    lines.append(f"{full}{self._format(labels)} {value:g}")
+                for labels, (counts, total) in sorted(histograms):
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + ("+Inf",), counts):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{self._format(labels + (('le', str(bound)),))} {cumulative}")
+                    lines.append(f"{full}_sum{self._format(labels)} {total:g}")
+                    lines.append(f"{full}_count{self._format(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _labels(labels: dict):
+        return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    @staticmethod
+    def _format(labels: tuple):
+        if not labels:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
@@ -0,0 +1,110 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Client attributes the interface is built from
+LISTS = (
+    "list_atr_size",
+    "list_atr_remix_model",
+    "list_atr_controlnets",
+    "list_atr_lora_rt",
+    "list_atr_models",
+    "list_atr_models_guide",
+    "list_atr_models_svi",
+    "list_atr_g_types",
+    "list_atr_lora_svi",
+    "list_atr_lora_flux",
+    "list_atr_g_variation",
+    "list_atr_g_structure",
+    "list_atr_g_facial",
+    "list_atr_g_style",
+    "list_atr_gfpgan",
+    "list_sty_styles",
+    "version",
+)
+
+class Options:
+    """
+    Option lists of an Atelier client.
+
+    The lists are read from the client in parallel. When a snapshot from a
+    previous run exists, it is used immediately and the lists are refreshed
+    from the client in the background, so startup does not wait on upstream.
+    `revision` is bumped whenever a refresh finds different lists.
+
+    Parameters:
+    - client (Client): Atelier Client instance
+    - path (str): Snapshot file of the last known lists
+    """
+    def __init__(self, client, path: str = None):
+        self.client = client
+        self.path = path
+        self.lists = {}
+        self.revision = 0
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name in LISTS:
+            return self.lists[name]
+        raise AttributeError(name)
+
+    def load(self):
+        """Load the lists from the snapshot if possible, otherwise from the client."""
+        snapshot = self._read()
+        if snapshot is not None:
+            self.lists = snapshot
+            threading.Thread(target=self._background, name="atelier-options", daemon=True).start()
+        else:
+            self.refresh()
+        return self
+
+    def refresh(self):
+        """Re-read every list from the client in parallel. Return True if anything changed."""
+        with ThreadPoolExecutor(len(LISTS)) as pool:
+            lists = dict(zip(LISTS, pool.map(lambda name: getattr(self.client, name), LISTS)))
+        with self.lock:
+            changed = lists != self.lists
+            # Unchanged lists keep their objects, the interface maps dropdowns to lists by identity
+            if changed:
+                self.lists = lists
+                self.revision += 1
+                self._write(lists)
+        return changed
+
+    def watch(self, interval: float):
+        """Refresh the lists from the client every `interval` seconds in the background."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                self._background()
+        threading.Thread(target=loop, name="atelier-options-watch", daemon=True).start()
+        return self
+
+    def _background(self):
+        try:
+            self.refresh()
+        except Exception:
+            pass
+
+    def _read(self):
+        if not self.path:
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return snapshot if all(name in snapshot for name in LISTS) else None
+
+    def _write(self, lists: dict):
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(lists, f)
+            os.replace(self.path + ".tmp", self.path)
+        except (OSError, TypeError):
+            pass
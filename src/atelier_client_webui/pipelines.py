@@ -0,0 +1,92 @@
+class First:
+    """Default to the first entry of a client option list."""
+    def __init__(self, name: str):
+        self.name = name
+
+class Pipeline:
+    """
+    A client method with named parameters in call order.
+
+    Parameters:
+    - method (str): Client method name
+    - params (list): (name, default) pairs in the order the method expects them
+    - images (tuple): Names of the parameters that are input image paths
+    """
+    def __init__(self, method: str, params: list, images: tuple = ()):
+        self.method = method
+        self.params = params
+        self.images = images
+
+    def default(self, name: str):
+        """Return the default value of a parameter."""
+        return dict(self.params)[name]
+
+    def args(self, values: dict, options=None):
+        """Return positional arguments for the client method from named `values`."""
+        unknown = set(values) - {name for name, _ in self.params}
+        if unknown:
+            raise ValueError(f"Unknown parameters for {self.method}: {', '.join(sorted(unknown))}")
+        args = []
+        for name, default in self.params:
+            value = values.get(name, default)
+            if isinstance(value, First):
+                choices = getattr(options, value.name, None) or [None]
+                value = choices[0]
+            elif isinstance(default, (int, float)) and isinstance(value, str):
+                value = type(default)(float(value)) if value.strip() else default
+            args.append(value)
+        return args
+
+    async def run(self, asa, values: dict, options=None, uploads=None):
+        """Run the pipeline on an AsyncClient and return the client result."""
+        values = dict(values)
+        if uploads is not None:
+            for name in self.images:
+                if values.get(name):
+                    values[name] = await asa.local(uploads.prepare, values[name], values.get("size"))
+        return await getattr(asa, self.method)(*self.args(values, options))
+
+PROMPT = [("prompt", ""), ("negative", "")]
+
+PIPELINES = {
+    "generate":    Pipeline("image_generate", PROMPT + [("model", First("list_atr_models")), ("size", First("list_atr_size")),
+                            ("lora_svi", First("list_atr_lora_svi")), ("lora_flux", First("list_atr_lora_flux")),
+                            ("seed", 0), ("style", First("list_sty_styles"))]),
+    "variation":   Pipeline("image_variation", [("image", None)] + PROMPT + [("model", First("list_atr_models_guide")),
+                            ("size", First("list_atr_size")), ("strength", First("list_atr_g_variation")),
+                            ("lora_svi", First("list_atr_lora_svi")), ("lora_flux", First("list_atr_lora_flux")),
+                            ("seed", 0), ("style", First("list_sty_styles"))], images=("image",)),
+    "structure":   Pipeline("image_structure", [("image", None)] + PROMPT + [("model", First("list_atr_models_svi")),
+                            ("size", First("list_atr_size")), ("strength", First("list_atr_g_structure")),
+                            ("lora_svi", First("list_atr_lora_svi")), ("seed", 0), ("style", First("list_sty_styles"))],
+                            images=("image",)),
+    "facial":      Pipeline("image_facial", [("image", None)] + PROMPT + [("model", First("list_atr_models_svi")),
+                            ("size", First("list_atr_size")), ("strength", First("list_atr_g_facial")),
+                            ("lora_svi", First("list_atr_lora_svi")), ("seed", 0), ("style", First("list_sty_styles"))],
+                            images=("image",)),
+    "style":       Pipeline("image_style", [("image", None)] + PROMPT + [("model", First("list_atr_models_svi")),
+                            ("size", First("list_atr_size")), ("strength", First("list_atr_g_style")),
+                            ("lora_svi", First("list_atr_lora_svi")), ("seed", 0), ("style", First("list_sty_styles"))],
+                            images=("image",)),
+    "controlnet":  Pipeline("image_controlnet", [("image", None)] + PROMPT + [("model", First("list_atr_remix_model")),
+                            ("control", First("list_atr_controlnets")), ("strength", 70), ("scale", 9.0),
+                            ("seed", 0), ("style", First("list_sty_styles"))], images=("image",)),
+    "upscale":     Pipeline("image_upscale", [("image", None)]),
+    "restore":     Pipeline("face_codeformer", [("image", None)]),
+    "bgremove":    Pipeline("image_bgremove", [("image", None)]),
+    "gfpgan":      Pipeline("face_gfpgan", [("image", None), ("model", First("list_atr_gfpgan"))]),
+    "caption":     Pipeline("image_caption", [("image", None)]),
+    "prompt":      Pipeline("image_prompt", [("image", None)]),
+    "enhance":     Pipeline("image_enhance", [("image", None)] + PROMPT + [("creativity", 0.3), ("resemblance", 1.0),
+                            ("hdr", 0.0), ("style", First("list_sty_styles"))]),
+    "realtime":    Pipeline("realtime_generate", PROMPT + [("size", First("list_atr_size")), ("lora", First("list_atr_lora_rt")),
+                            ("seed", 0), ("style", First("list_sty_styles"))]),
+    "canvas":      Pipeline("realtime_canvas", [("image", None)] + PROMPT + [("lora", First("list_atr_lora_rt")),
+                            ("strength", 1.0), ("seed", 0), ("style", First("list_sty_styles"))], images=("image",)),
+    "consistency": Pipeline("image_consistent", [("prompt", ""), ("face", None), ("style_image", None), ("negative", ""),
+                            ("size", First("list_atr_size")), ("face_strength", 1.2), ("style_strength", 0.7),
+                            ("seed", 0), ("style", First("list_sty_styles"))], images=("face", "style_image")),
+    "identity":    Pipeline("face_identity", [("face", None)] + PROMPT + [("size", First("list_atr_size")),
+                            ("face_strength", 1.0), ("seed", 0), ("style", First("list_sty_styles"))], images=("face",)),
+    "outpaint":    Pipeline("image_outpaint", [("image", None), ("size", First("list_atr_size"))], images=("image",)),
+}
@@ -0,0 +1,152 @@
+import time
+import inspect
+import functools
+import threading
+from .metrics import Metrics
+
+class Backend:
+    """Health and load of one client in a pool."""
+    def __init__(self, client, index: int):
+        self.client = client
+        self.name = str(index)
+        self.outstanding = 0
+        self.failures = 0
+        self.opened = 0.0
+        self.trial = False
+
+class ClientPool:
+    """
+    Several Atelier clients behind the interface of one.
+
+    Every call goes to the available client with the fewest requests in
+    flight. A client that raises or returns None `failures` times in a row is
+    taken out of rotation for `cooldown` seconds, then gets a single trial
+    request that either closes or reopens its circuit. A failed call is
+    retried once on another client. Non-callable attributes such as option
+    lists are read from the first client that provides them.
+
+    Parameters:
+    - clients (list): Atelier Client instances
+    - failures (int): Consecutive failures that open the circuit of a client
+    - cooldown (float): Seconds a client stays out of rotation
+    - retries (int): Additional clients tried after a failed call
+    - metrics (Metrics): Receives per-backend load and health metrics
+    """
+    def __init__(self, clients: list, failures: int = 3, cooldown: float = 30, retries: int = 1,
+                 metrics: Metrics = None):
+        if not clients:
+            raise ValueError("ClientPool needs at least one client")
+        self.backends = [Backend(client, n) for n, client in enumerate(clients)]
+        self.failures = max(1, failures)
+        self.cooldown = cooldown
+        self.retries = retries
+        self.metrics = metrics
+        self.lock = threading.Lock()
+        if metrics is not None:
+            metrics.describe("backend_outstanding", "gauge", "Requests in flight per backend client")
+            metrics.describe("backend_failures_total", "counter", "Calls that raised or returned None per backend client")
+            metrics.describe("backend_open", "gauge", "Backend clients taken out of rotation by their circuit breaker")
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        attr = getattr(self.backends[0].client, name)
+        if not callable(attr):
+            for backend in self.backends:
+                try:
+                    value = getattr(backend.client, name)
+                except Exception:
+                    continue
+                if value:
+                    return value
+            return attr
+
+        if inspect.iscoroutinefunction(attr):
+            @functools.wraps(attr)
+            async def call(*args):
+                tried = []
+                for _ in range(1 + self.retries):
+                    backend = self._acquire(tried)
+                    if backend is None:
+                        break
+                    results = None
+                    try:
+                        results = await getattr(backend.client, name)(*args)
+                    except Exception as e:
+                        self._log(backend, e)
+                    finally:
+                        self._release(backend, results is not None)
+                    if results is not None:
+                        return results
+                return None
+        else:
+            @functools.wraps(attr)
+            def call(*args):
+                tried = []
+                for _ in range(1 + self.retries):
+                    backend = self._acquire(tried)
+                    if backend is None:
+                        break
+                    results = None
+                    try:
+                        results = getattr(backend.client, name)(*args)
+                    except Exception as e:
+                        self._log(backend, e)
+                    finally:
+                        self._release(backend, results is not None)
+                    if results is not None:
+                        return results
+                return None
+        return call
+
+    @staticmethod
+    def _log(backend: Backend, error: Exception):
+        # Failover to another client, like a None result
+        logger = getattr(backend.client, "logger", None)
+        if logger is not None:
+            logger.error(f"Backend {backend.name} error: {error}")
+
+    def _acquire(self, tried: list):
+        """Reserve the least loaded available backend not in `tried`."""
+        now = time.monotonic()
+        with self.lock:
+            available = []
+            for backend in self.backends:
+                if backend in tried:
+                    continue
+                if backend.failures < self.failures:
+                    available.append(backend)
+                elif not backend.trial and now - backend.opened >= self.cooldown:
+                    available.append(backend)
+            if not available:
+                # Every circuit is open: keep serving from the least recently failed client
+                if tried:
+                    return None
+                available = [min(self.backends, key=lambda b: b.opened)]
+            # A client whose cooldown is over gets the next request as its trial
+            backend = min(available, key=lambda b: (b.failures < self.failures, b.outstanding, b.failures))
+            if backend.failures >= self.failures:
+                backend.trial = True
+            backend.outstanding += 1
+            tried.append(backend)
+            self._update(backend)
+            return backend
+
+    def _release(self, backend: Backend, ok: bool):
+        with self.lock:
+            backend.outstanding -= 1
+            backend.trial = False
+            if ok:
+                backend.failures = 0
+            else:
+                backend.failures += 1
+                if backend.failures >= self.failures:
+                    backend.opened = time.monotonic()
+                if self.metrics is not None:
+                    self.metrics.inc("backend_failures_total", backend=backend.name)
+            self._update(backend)
+
+    def _update(self, backend: Backend):
+        if self.metrics is not None:
+            self.metrics.set("backend_outstanding", backend.outstanding, backend=backend.name)
+            self.metrics.set("backend_open", int(backend.failures >= self.failures), backend=backend.name)
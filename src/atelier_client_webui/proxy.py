@@ -0,0 +1,91 @@
+import asyncio
+import inspect
+import functools
+from .cache import ResultCache, digest
+from .store import ResultStore
+from .tempfiles import TempFiles
+
+# Client methods whose results are reproducible, mapped to the position of
+# their seed argument. None means the method has no seed and is always cached.
+CACHEABLE = {
+    "image_generate":    6,
+    "image_variation":   8,
+    "image_structure":   7,
+    "image_facial":      7,
+    "image_style":       7,
+    "image_controlnet":  7,
+    "image_consistent":  7,
+    "face_identity":     5,
+    "realtime_generate": 4,
+    "realtime_canvas":   5,
+    "image_upscale":     None,
+    "image_bgremove":    None,
+    "face_codeformer":   None,
+    "face_gfpgan":       None,
+    "image_caption":     None,
+    "image_prompt":      None,
+}
+
+def deterministic(name: str, args: tuple):
+    """Return whether a call of the client method `name` with `args` always gives the same results."""
+    if name not in CACHEABLE:
+        return False
+    seed = CACHEABLE[name]
+    return seed is None or (len(args) > seed and (args[seed] or 0) > 0)
+
+class ClientProxy:
+    """
+    Wrap an Atelier client, serve repeated deterministic requests from a
+    shared result cache and keep result files in a result store. Every other
+    attribute is forwarded to the client.
+
+    Parameters:
+    - client (Client): Atelier Client instance
+    - cache (ResultCache): Result cache shared across sessions
+    - store (ResultStore): Content-addressed store receiving every result file
+    - files (TempFiles): Removes the client's own copies of result files once they expire
+    """
+    def __init__(self, client, cache: ResultCache = None, store: ResultStore = None, files: TempFiles = None):
+        self.client = client
+        self.cache = cache
+        self.store = store
+        self.files = files
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr) or (self.store is None and self.files is None and (self.cache is None or name not in CACHEABLE)):
+            return attr
+
+        if inspect.iscoroutinefunction(attr):
+            @functools.wraps(attr)
+            async def call(*args):
+                # Hashing arguments and storing results touch the disk, keep them off the event loop
+                loop = asyncio.get_running_loop()
+                key, results = await loop.run_in_executor(None, self._lookup, name, args)
+                if results is None:
+                    results = await loop.run_in_executor(None, self._keep, key, await attr(*args))
+                return results
+        else:
+            @functools.wraps(attr)
+            def call(*args):
+                key, results = self._lookup(name, args)
+                if results is None:
+                    results = self._keep(key, attr(*args))
+                return results
+        return call
+
+    def _lookup(self, name: str, args: tuple):
+        """Return the cache key of a call (None if it is not cached) and its cached results."""
+        if self.cache is None or not deterministic(name, args):
+            return None, None
+        key = digest(name, *args)
+        return key, self.cache.get(key)
+
+    def _keep(self, key: str, results):
+        if self.files is not None:
+            self.files.track(results)
+        if self.store is not None:
+            results = self.store.put(results)
+        if key is not None:
+            self.cache.put(key, results)
+        return results
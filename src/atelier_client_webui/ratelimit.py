@@ -0,0 +1,123 @@
+import time
+import threading
+from collections import OrderedDict
+from .metrics import Metrics
+from .scheduler import COSTS
+
+class RateLimiter:
+    """
+    Per-user token buckets weighted by endpoint cost, with a usage ledger.
+
+    Every user gets a bucket of `burst` tokens that refills at `rate` tokens
+    per second. A request takes the cost of its endpoint from the bucket, or
+    is rejected with the time until enough tokens are back. Users are keyed by
+    authenticated user name, client IP or session. The ledger keeps the
+    `users` most recently active users.
+
+    Parameters:
+    - rate (float): Tokens per second and user
+    - burst (float): Bucket size, the cost a user can spend at once
+    - costs (dict): Per-endpoint costs, defaults to the scheduler costs
+    - key (str): "user" (user name, else IP), "ip" or "session"
+    - metrics (Metrics): Receives rejection and usage metrics
+    - users (int): Maximum number of users in the ledger
+    """
+    def __init__(self, rate: float, burst: float = 10.0, costs: dict = None, key: str = "user",
+                 metrics: Metrics = None, users: int = 10000):
+        if key not in ("user", "ip", "session"):
+            raise ValueError(f"Unknown rate limit key: {key}")
+        self.rate = rate
+        self.burst = burst
+        self.costs = {**COSTS, **(costs or {})}
+        self.key = key
+        self.metrics = metrics
+        self.buckets = {}
+        self.users = max(1, users)
+        self.ledger = OrderedDict()
+        self.lock = threading.Lock()
+        if metrics is not None:
+            metrics.describe("rate_limited_total", "counter", "Requests rejected by the per-user rate limit")
+            metrics.describe("usage_cost_total", "counter", "Cost of admitted requests per endpoint")
+
+    def identity(self, request):
+        """Return the ledger key of a Gradio request."""
+        if request is None:
+            return "anonymous"
+        if self.key == "user" and getattr(request, "username", None):
+            return f"user:{request.username}"
+        if self.key in ("user", "ip"):
+            client = getattr(request, "client", None)
+            if client is not None and getattr(client, "host", None):
+                return f"ip:{client.host}"
+        return f"session:{getattr(request, 'session_hash', None)}"
+
+    def cost(self, endpoint: str):
+        """Return the cost of one call of an endpoint."""
+        return self.costs.get(endpoint, 1.0)
+
+    def check(self, request, endpoint: str, cost: float = None):
+        """Return 0 if a request would be admitted now, else the seconds until it would be. Takes nothing."""
+        cost = min(self.cost(endpoint) if cost is None else cost, self.burst)
+        now = time.monotonic()
+        with self.lock:
+            tokens = self._tokens(self.identity(request), now)
+        return self._wait(tokens, cost)
+
+    def take(self, request, endpoint: str, cost: float = None):
+        """Admit a request and return 0, or return the seconds until it would be admitted.
+
+        Requests that run several upstream calls pass their total `cost`."""
+        user = self.identity(request)
+        cost = min(self.cost(endpoint) if cost is None else cost, self.burst)
+        now = time.monotonic()
+        with self.lock:
+            tokens = self._tokens(user, now)
+            if tokens < cost:
+                self.buckets[user] = (tokens, now)
+                self._entry(user)["rejected"] += 1
+                wait = self._wait(tokens, cost)
+            else:
+                self.buckets[user] = (tokens - cost, now)
+                entry = self._entry(user)
+                entry["requests"] += 1
+                entry["cost"] += cost
+                wait = 0.0
+            if len(self.buckets) > 10000:
+                self._prune(now)
+        if self.metrics is not None:
+            if wait:
+                self.metrics.inc("rate_limited_total", endpoint=endpoint)
+            else:
+                self.metrics.inc("usage_cost_total", cost, endpoint=endpoint)
+        return wait
+
+    def usage(self):
+        """Return the ledger as {user: {"requests", "cost", "rejected"}}."""
+        with self.lock:
+            return {user: dict(entry) for user, entry in self.ledger.items()}
+
+    def _entry(self, user: str):
+        # Least recently active users leave the ledger first
+        entry = self.ledger.get(user)
+        if entry is None:
+            entry = self.ledger[user] = {"requests": 0, "cost": 0.0, "rejected": 0}
+            while len(self.ledger) > self.users:
+                self.ledger.popitem(last=False)
+        else:
+            self.ledger.move_to_end(user)
+        return entry
+
+    def _tokens(self, user: str, now: float):
+        tokens, last = self.buckets.get(user, (self.burst, now))
+        return min(self.burst, tokens + (now - last) * self.rate)
+
+    def _wait(self, tokens: float, cost: float):
+        if tokens >= cost:
+            return 0.0
+        return (cost - tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def _prune(self, now: float):
+        # Buckets that refilled completely carry no state
+        for user, (tokens, last) in list(self.buckets.items()):
+            if tokens + (now - last) * self.rate >= self.burst:
+                del self.buckets[user]
@@ -0,0 +1,106 @@
+import heapq
+import asyncio
+import itertools
+import contextlib
+from contextvars import ContextVar
+
+# Relative cost of one request per endpoint. Heavier endpoints advance the
+# virtual clock of their user further, so cheap tools are not starved.
+COSTS = {
+    "generate":    1.0,
+    "variation":   1.0,
+    "structure":   1.0,
+    "facial":      1.0,
+    "style":       1.0,
+    "controlnet":  1.0,
+    "upscale":     2.0,
+    "restore":     1.0,
+    "bgremove":    1.0,
+    "gfpgan":      1.0,
+    "caption":     0.25,
+    "prompt":      0.25,
+    "enhance":     4.0,
+    "eraser":      1.0,
+    "fill":        1.0,
+    "realtime":    0.5,
+    "canvas":      0.5,
+    "live":        0.25,
+    "live_canvas": 0.25,
+    "consistency": 3.0,
+    "identity":    2.0,
+    "outpaint":    2.0,
+}
+
+# (endpoint, user) of the event currently being handled
+current = ContextVar("atelier_event", default=("default", None))
+
+# Progress of the event currently being handled: "ahead" (callable returning
+# the requests waiting in front of it) while queued, "started" once upstream
+status = ContextVar("atelier_status", default=None)
+
+class FairScheduler:
+    """
+    Weighted fair scheduler for upstream calls.
+
+    Each request gets a virtual finish tag of `max(clock, last tag of its
+    user) + cost of its endpoint`, and free slots always go to the waiting
+    request with the smallest tag. Users with a burst of expensive jobs
+    therefore queue behind light requests of other users instead of
+    starving them.
+
+    Parameters:
+    - capacity (int): Maximum number of concurrent upstream calls
+    - costs (dict): Per-endpoint cost overrides
+    """
+    def __init__(self, capacity: int = 64, costs: dict = None):
+        self.capacity = max(1, capacity)
+        self.costs = {**COSTS, **(costs or {})}
+        self.active = 0
+        self.clock = 0.0
+        self.finish = {}
+        self.waiting = []
+        self.order = itertools.count()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, endpoint: str = "default", user: str = None):
+        """Hold one upstream slot for the duration of the block."""
+        tag = max(self.clock, self.finish.get(user, 0.0)) + self.costs.get(endpoint, 1.0)
+        self.finish[user] = tag
+        if self.active < self.capacity and not self.waiting:
+            self.active += 1
+            self.clock = tag
+        else:
+            ready = asyncio.get_running_loop().create_future()
+            entry = (tag, next(self.order), ready)
+            heapq.heappush(self.waiting, entry)
+            state = status.get()
+            if state is not None:
+                state["ahead"] = lambda: self.position(entry)
+            try:
+                await ready
+            except asyncio.CancelledError:
+                if ready.done() and not ready.cancelled():
+                    self._release()
+                raise
+            finally:
+                if state is not None:
+                    state["ahead"] = None
+        try:
+            yield
+        finally:
+            self._release()
+
+    def position(self, entry: tuple):
+        """Return the number of requests waiting in front of `entry`."""
+        return sum(1 for other in self.waiting if other[:2] < entry[:2] and not other[2].done())
+
+    def _release(self):
+        while self.waiting:
+            tag, _, ready = heapq.heappop(self.waiting)
+            if not ready.done():
+                self.clock = tag
+                ready.set_result(None)
+                return
+        self.active -= 1
+        if len(self.finish) > 4096:
+            self.finish = {k: v for k, v in self.finish.items() if v > self.clock}
@@ -0,0 +1,155 @@
+import os
+import shutil
+import threading
+from .cache import digest
+
+class ResultStore:
+    """
+    Content-addressed storage for result files.
+
+    Subclasses decide where the bytes live (a local directory, an
+    S3-compatible bucket, ...). Every result is stored once per content hash
+    and `put` returns the path the web interface serves.
+    """
+    def put(self, path):
+        """Store the file at `path` and return its stored path. Anything that is not a file is returned unchanged."""
+        raise NotImplementedError
+
+    def get(self, key: str):
+        """Return the stored path for a content hash, or None."""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Remove a stored result."""
+        raise NotImplementedError
+
+    def usage(self):
+        """Return the number of bytes used by stored results."""
+        raise NotImplementedError
+
+    def collect(self):
+        """Remove results until the store fits its quota and return the number of bytes freed."""
+        return 0
+
+    def close(self):
+        """Stop background work of the store."""
+
+class LocalStore(ResultStore):
+    """
+    Result store in a local directory that survives restarts.
+
+    Results are hard-linked (or copied across file systems) to
+    `<directory>/<hash[:2]>/<hash><ext>`, so a result produced twice is
+    stored once. A background thread removes the least recently stored
+    results whenever the directory grows past `quota`.
+
+    Parameters:
+    - directory (str): Directory holding the stored results
+    - quota (int): Size budget in bytes (0 for no limit)
+    - interval (float): Seconds between garbage collector runs
+    - keep (callable): Returns True for stored paths that must not be collected
+    """
+    def __init__(self, directory: str, quota: int = 4 << 30, interval: float = 60, keep=None):
+        self.directory = directory
+        self.quota = quota
+        self.interval = interval
+        self.keep = keep
+        self.stop = threading.Event()
+        self.lock = threading.Lock()
+        if quota > 0 and interval > 0:
+            threading.Thread(target=self._background, name="atelier-store", daemon=True).start()
+
+    def put(self, path):
+        if not isinstance(path, str) or not os.path.isfile(path):
+            return path
+        # Already stored, e.g. a cached result
+        if os.path.dirname(os.path.dirname(os.path.abspath(path))) == os.path.abspath(self.directory):
+            return path
+        key = digest(path)
+        stored = self._path(key, os.path.splitext(path)[1].lower())
+        with self.lock:
+            if os.path.exists(stored):
+                os.utime(stored)
+                return stored
+            os.makedirs(os.path.dirname(stored), exist_ok=True)
+            try:
+                os.link(path, stored + ".tmp")
+            except OSError:
+                try:
+                    shutil.copyfile(path, stored + ".tmp")
+                except OSError:
+                    return path
+            os.replace(stored + ".tmp", stored)
+        return stored
+
+    def get(self, key: str):
+        folder = os.path.join(self.directory, key[:2])
+        try:
+            names = os.listdir(folder)
+        except OSError:
+            return None
+        for name in names:
+            if name.startswith(key) and not name.endswith(".tmp"):
+                return os.path.join(folder, name)
+        return None
+
+    def delete(self, key: str):
+        path = self.get(key)
+        if path is not None:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def usage(self):
+        return sum(size for _, _, size in self._scan())
+
+    def collect(self):
+        if self.quota <= 0:
+            return 0
+        files = sorted(self._scan())
+        used = sum(size for _, _, size in files)
+        freed = 0
+        with self.lock:
+            for _, path, size in files:
+                if used - freed <= self.quota:
+                    break
+                if self.keep is not None and self.keep(path):
+                    continue
+                try:
+                    os.remove(path)
+                    freed += size
+                except OSError:
+                    pass
+        return freed
+
+    def close(self):
+        self.stop.set()
+
+    def _path(self, key: str, ext: str):
+        return os.path.join(self.directory, key[:2], key + ext)
+
+    def _scan(self):
+        """Return (mtime, path, size) of every stored result."""
+        files = []
+        try:
+            folders = os.scandir(self.directory)
+        except OSError:
+            return files
+        with folders:
+            for folder in folders:
+                if not folder.is_dir():
+                    continue
+                with os.scandir(folder.path) as entries:
+                    for entry in entries:
+                        if entry.is_file() and not entry.name.endswith(".tmp"):
+                            stat = entry.stat()
+                            files.append((stat.st_mtime, entry.path, stat.st_size))
+        return files
+
+    def _background(self):
+        while not self.stop.wait(self.interval):
+            try:
+                self.collect()
+            except OSError:
+                pass
@@ -0,0 +1,143 @@
+import os
+import time
+import threading
+from collections import Counter
+from .metrics import Metrics
+
+class TempFiles:
+    """
+    Lifecycle manager for temporary files on local disk.
+
+    Files in the managed directories (Gradio uploads, prepared inputs,
+    previews) and tracked client outputs are removed once they are older than
+    `max_age`, and the oldest ones go first while an area is larger than
+    `max_size`. Files referenced by a gallery history are never removed.
+
+    Parameters:
+    - directories (dict): Managed areas as {name: directory}
+    - max_age (float): Age in seconds after which unreferenced files are removed (0 to disable)
+    - max_size (int): Size budget in bytes per area (0 for no limit)
+    - interval (float): Seconds between sweeps
+    - metrics (Metrics): Receives disk usage and eviction metrics
+    """
+    def __init__(self, directories: dict, max_age: float = 86400, max_size: int = 0, interval: float = 300,
+                 metrics: Metrics = None):
+        self.directories = directories
+        self.max_age = max_age
+        self.max_size = max_size
+        self.interval = interval
+        self.metrics = metrics
+        self.refs = Counter()
+        self.tracked = {}
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        if metrics is not None:
+            metrics.describe("disk_bytes", "gauge", "Bytes of temporary files per area")
+            metrics.describe("disk_files", "gauge", "Temporary files per area")
+            metrics.describe("disk_evicted_bytes_total", "counter", "Bytes of temporary files removed per area")
+        if interval > 0:
+            threading.Thread(target=self._background, name="atelier-tempfiles", daemon=True).start()
+
+    def track(self, path):
+        """Manage a file outside the managed directories, such as a client output."""
+        if isinstance(path, str) and os.path.isfile(path):
+            with self.lock:
+                self.tracked[os.path.abspath(path)] = time.time()
+        return path
+
+    def retain(self, path):
+        """Add a reference to `path`."""
+        if isinstance(path, str):
+            with self.lock:
+                self.refs[os.path.abspath(path)] += 1
+
+    def release(self, path):
+        """Drop a reference to `path`."""
+        if isinstance(path, str):
+            path = os.path.abspath(path)
+            with self.lock:
+                self.refs[path] -= 1
+                if self.refs[path] <= 0:
+                    del self.refs[path]
+
+    def referenced(self, path: str):
+        """Return whether a history still references `path`."""
+        with self.lock:
+            return os.path.abspath(path) in self.refs
+
+    def sweep(self):
+        """Remove expired files and shrink every area to its budget. Return the number of bytes freed."""
+        now = time.time()
+        areas = {name: self._scan(directory) for name, directory in self.directories.items()}
+        roots = {os.path.abspath(directory) for directory in self.directories.values()}
+        with self.lock:
+            tracked = list(self.tracked.items())
+        areas["outputs"] = []
+        for path, seen in tracked:
+            try:
+                areas["outputs"].append((seen, path, os.path.getsize(path)))
+            except OSError:
+                with self.lock:
+                    self.tracked.pop(path, None)
+
+        freed = 0
+        for name, files in areas.items():
+            files.sort()
+            used, count, evicted = sum(size for _, _, size in files), len(files), 0
+            for mtime, path, size in files:
+                expired = self.max_age > 0 and now - mtime > self.max_age
+                if not expired and (self.max_size <= 0 or used <= self.max_size):
+                    continue
+                if self.referenced(path) or not self._remove(path, roots):
+                    continue
+                used, count, evicted = used - size, count - 1, evicted + size
+            freed += evicted
+            if self.metrics is not None:
+                self.metrics.set("disk_bytes", used, area=name)
+                self.metrics.set("disk_files", count, area=name)
+                self.metrics.inc("disk_evicted_bytes_total", evicted, area=name)
+        return freed
+
+    def close(self):
+        self.stop.set()
+
+    def _remove(self, path: str, roots: set):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            return False
+        with self.lock:
+            self.tracked.pop(path, None)
+        # Gradio keeps every upload in its own folder
+        folder = os.path.dirname(os.path.abspath(path))
+        if folder not in roots and any(folder.startswith(root + os.sep) for root in roots):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass
+        return True
+
+    @staticmethod
+    def _scan(directory: str):
+        """Return (mtime, path, size) of every file below `directory`."""
+        files = []
+        for root, _, names in os.walk(directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, path, stat.st_size))
+        return files
+
+    def _background(self):
+        while True:
+            try:
+                self.sweep()
+            except OSError:
+                pass
+            if self.stop.wait(self.interval):
+                break
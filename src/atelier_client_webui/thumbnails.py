@@ -0,0 +1,50 @@
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image
+from .cache import digest
+
+class Thumbnails:
+    """
+    Small WebP previews of result images, cached on disk by content hash.
+
+    Parameters:
+    - directory (str): Directory holding the previews
+    - size (int): Maximum width and height of a preview in pixels
+    - quality (int): WebP quality of the previews
+    - capacity (int): Number of result paths remembered in memory
+    """
+    def __init__(self, directory: str, size: int = 384, quality: int = 80, capacity: int = 10000):
+        self.directory = directory
+        self.size = size
+        self.quality = quality
+        self.capacity = capacity
+        self.previews = OrderedDict()
+        self.lock = threading.Lock()
+
+    def make(self, path):
+        """Create the preview of an image result and return its path, or None."""
+        if not isinstance(path, str) or not os.path.isfile(path):
+            return None
+        preview = os.path.join(self.directory, digest(path, self.size) + ".webp")
+        if not os.path.exists(preview):
+            try:
+                with Image.open(path) as image:
+                    image.thumbnail((self.size, self.size))
+                    os.makedirs(self.directory, exist_ok=True)
+                    image.save(preview + ".tmp", "WEBP", quality=self.quality)
+                os.replace(preview + ".tmp", preview)
+            except (OSError, ValueError):
+                return None
+        with self.lock:
+            self.previews[path] = preview
+            self.previews.move_to_end(path)
+            while len(self.previews) > self.capacity:
+                self.previews.popitem(last=False)
+        return preview
+
+    def get(self, path):
+        """Return the preview of `path` if there is one, otherwise `path` itself."""
+        with self.lock:
+            preview = self.previews.get(path) if isinstance(path, str) else None
+        return preview if preview is not None and os.path.exists(preview) else path
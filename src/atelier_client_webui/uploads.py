@@ -0,0 +1,79 @@
+import os
+import re
+import tempfile
+from PIL import Image, ImageOps
+from .cache import digest
+
+# Image info keys that carry EXIF, XMP or comment metadata
+METADATA = ("exif", "xmp", "XML:com.adobe.xmp", "comment", "photoshop")
+
+class Uploads:
+    """
+    Downscale and re-encode input images before they are sent upstream.
+
+    Images are fitted inside the target size of the request (or `max_side`
+    when the request has no size), rotated according to their EXIF
+    orientation and saved without metadata. An original is only sent as-is
+    when it carries no metadata and re-encoding would not make it smaller.
+    Results are cached on disk by the hash of the input and the target size.
+
+    Parameters:
+    - directory (str): Directory holding the prepared images
+    - max_side (int): Longest side used when a request has no target size
+    - quality (int): JPEG quality of the prepared images
+    """
+    def __init__(self, directory: str, max_side: int = 1536, quality: int = 90):
+        self.directory = directory
+        self.max_side = max_side
+        self.quality = quality
+        self.originals = set()
+
+    def prepare(self, path, size: str = None):
+        """Return the path of the prepared copy of `path`, or `path` if it cannot be improved."""
+        if not isinstance(path, str) or not os.path.isfile(path):
+            return path
+        side = self._side(size)
+        key = digest(path, side)
+        if key in self.originals:
+            return path
+        for ext in (".jpg", ".png"):
+            if os.path.exists(os.path.join(self.directory, key + ext)):
+                return os.path.join(self.directory, key + ext)
+        prepared = None
+        try:
+            with Image.open(path) as image:
+                metadata = bool(image.getexif()) or bool(getattr(image, "text", None)) or any(k in image.info for k in METADATA)
+                image = ImageOps.exif_transpose(image)
+                resized = max(image.size) > side
+                if resized:
+                    image.thumbnail((side, side), Image.LANCZOS)
+                alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+                ext, options = (".png", {"optimize": True}) if alpha else (".jpg", {"quality": self.quality, "optimize": True})
+                image = image.convert("RGBA" if alpha else "RGB")
+                prepared = os.path.join(self.directory, key + ext)
+                os.makedirs(self.directory, exist_ok=True)
+                # Concurrent prepares of the same input each write their own file, the last replace wins
+                fd, temp = tempfile.mkstemp(ext, key, self.directory)
+                os.close(fd)
+                try:
+                    image.save(temp, "PNG" if alpha else "JPEG", **options)
+                    original = not resized and not metadata and os.path.getsize(temp) >= os.path.getsize(path)
+                    if not original:
+                        os.replace(temp, prepared)
+                finally:
+                    if os.path.exists(temp):
+                        os.remove(temp)
+        except (OSError, ValueError):
+            return prepared if prepared is not None and os.path.exists(prepared) else path
+        if original:
+            if len(self.originals) > 10000:
+                self.originals.clear()
+            self.originals.add(key)
+            return path
+        return prepared
+
+    def _side(self, size):
+        match = re.search(r"(\d+)\s*[x×*]\s*(\d+)", str(size or ""))
+        if match and min(int(match[1]), int(match[2])) >= 64:
+            return max(int(match[1]), int(match[2]))
+        return self.max_side
@@ -0,0 +1,57 @@
+import time
+import asyncio
+from atelier_client_webui.aio import AsyncClient
+from atelier_client_webui.cache import ResultCache
+from atelier_client_webui.proxy import ClientProxy
+from atelier_client_webui.scheduler import FairScheduler, current
+
+class Client:
+    """Client whose every generation returns a new image."""
+    def __init__(self):
+        self.calls = 0
+
+    async def image_generate(self, *args):
+        self.calls += 1
+        image = f"img{self.calls}"
+        await asyncio.sleep(0.05)
+        return image
+
+def batch(client, seed, count=4):
+    asa = AsyncClient(client, workers=count)
+    async def run():
+        return await asyncio.gather(*[asa.image_generate("cat", "", "model", "1024x1024", "none", "none", seed, "none")
+                                      for _ in range(count)])
+    return asyncio.run(run())
+
+def test_random_seed_batch_is_not_coalesced():
+    for seed in (0, -1):
+        client = Client()
+        results = batch(client, seed)
+        assert client.calls == 4
+        assert len(set(results)) == 4
+
+def test_fixed_seed_batch_is_coalesced():
+    client = Client()
+    results = batch(client, 7)
+    assert client.calls == 1
+    assert results == ["img1"] * 4
+
+def test_cache_hit_skips_endpoint_limit_and_scheduler():
+    client = Client()
+    asa = AsyncClient(ClientProxy(client, ResultCache()), 4, FairScheduler(1), limits={"generate": 1})
+    args = ("cat", "", "model", "1024x1024", "none", "none", 7, "none")
+    async def run():
+        current.set(("generate", "user"))
+        first = await asa.image_generate(*args)
+        # Holds the only scheduler slot and endpoint slot for a while
+        slow = asyncio.ensure_future(asa.image_generate("dog", "", "model", "1024x1024", "none", "none", 0, "none"))
+        await asyncio.sleep(0.01)
+        start = time.perf_counter()
+        again = await asa.image_generate(*args)
+        elapsed = time.perf_counter() - start
+        await slow
+        return first, again, elapsed
+    first, again, elapsed = asyncio.run(run())
+    assert first == again == "img1"
+    assert client.calls == 2
+    assert elapsed < 0.03
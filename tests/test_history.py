@@ -0,0 +1,31 @@
+import os
+from atelier_client_webui.history import History
+from atelier_client_webui.tempfiles import TempFiles
+
+def fill(history, count):
+    for n in range(count):
+        history.add((f"/results/{n}.png", f"caption {n}"))
+
+def test_old_items_spill_to_disk_and_page_back(tmp_path):
+    history = History(cap=2, page=2, directory=str(tmp_path))
+    fill(history, 5)
+    assert len(history) == 5
+    assert len(history.items) == 2
+    assert [path for path, _ in history.view()] == ["/results/4.png", "/results/3.png"]
+    assert [path for path, _ in history.more()] == [f"/results/{n}.png" for n in (4, 3, 2, 1)]
+    assert history.more()[-1] == ("/results/0.png", "caption 0")
+    # Nothing left to page to
+    assert len(history.more()) == 5
+    # A new item shows the first page again
+    assert len(history.add(("/results/5.png", "caption 5"))) == 2
+
+def test_close_removes_spill_files_and_releases_references(tmp_path):
+    files = TempFiles({}, interval=0)
+    history = History(cap=2, page=2, directory=str(tmp_path), files=files)
+    fill(history, 4)
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(history.path) + ext for ext in (".idx", ".jsonl")]
+    assert files.referenced("/results/0.png")
+    history.close()
+    assert os.listdir(tmp_path) == []
+    assert len(history) == 0
+    assert not any(files.refs.values())
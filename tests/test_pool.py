@@ -0,0 +1,48 @@
+import time
+from atelier_client_webui.pool import ClientPool
+
+class Backend:
+    """Client whose captions fail while `fail` is set."""
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = 0
+
+    def image_caption(self, image):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("backend down")
+        return f"caption of {image}"
+
+def test_failed_call_fails_over_and_opens_circuit():
+    bad, good = Backend(fail=True), Backend()
+    pool = ClientPool([bad, good], failures=1, cooldown=60)
+    assert pool.image_caption("cat") == "caption of cat"
+    assert (bad.calls, good.calls) == (1, 1)
+    # The failed backend is out of rotation until its cooldown is over
+    for _ in range(3):
+        assert pool.image_caption("cat") == "caption of cat"
+    assert (bad.calls, good.calls) == (1, 4)
+
+def test_trial_request_reopens_or_closes_circuit():
+    bad, good = Backend(fail=True), Backend()
+    pool = ClientPool([bad, good], failures=1, cooldown=0.05)
+    pool.image_caption("cat")
+    time.sleep(0.06)
+    # The trial fails: the circuit reopens for another cooldown
+    assert pool.image_caption("cat") == "caption of cat"
+    assert bad.calls == 2
+    pool.image_caption("cat")
+    assert bad.calls == 2
+    time.sleep(0.06)
+    # The trial succeeds: the backend is back in rotation
+    bad.fail = False
+    assert pool.image_caption("cat") == "caption of cat"
+    assert bad.calls == 3
+    assert pool.backends[0].failures == 0
+    # Sequential calls go to the first of the equally loaded backends
+    pool.image_caption("cat")
+    assert bad.calls == 4
+
+def test_every_backend_failing_returns_none():
+    pool = ClientPool([Backend(fail=True), Backend(fail=True)], failures=1, cooldown=60)
+    assert pool.image_caption("cat") is None
@@ -0,0 +1,44 @@
+from types import SimpleNamespace
+from atelier_client_webui import ratelimit
+from atelier_client_webui.ratelimit import RateLimiter
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def session(name):
+    return SimpleNamespace(session_hash=name, username=None, client=None)
+
+def test_bucket_refills_at_rate(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    limiter = RateLimiter(rate=0.5, burst=2, costs={"generate": 1.0}, key="session")
+    assert limiter.take(session("a"), "generate") == 0
+    assert limiter.take(session("a"), "generate") == 0
+    assert limiter.take(session("a"), "generate") == 2.0
+    # Other users have their own bucket
+    assert limiter.take(session("b"), "generate") == 0
+    clock.now += 1
+    assert limiter.take(session("a"), "generate") == 1.0
+    clock.now += 1
+    assert limiter.take(session("a"), "generate") == 0
+    assert limiter.usage()["session:a"] == {"requests": 3, "cost": 3.0, "rejected": 2}
+
+def test_check_takes_nothing_and_steps_add_up(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    limiter = RateLimiter(rate=1, burst=4, costs={"upscale": 2.0, "restore": 1.0}, key="session")
+    assert limiter.check(session("a"), "toolkit", 3.0) == 0
+    assert limiter.check(session("a"), "toolkit", 3.0) == 0
+    assert limiter.take(session("a"), "toolkit", limiter.cost("upscale") + limiter.cost("restore")) == 0
+    assert limiter.check(session("a"), "toolkit", 3.0) == 2.0
+    assert limiter.usage()["session:a"]["cost"] == 3.0
+
+def test_ledger_keeps_most_recently_active_users():
+    limiter = RateLimiter(rate=1, burst=10, key="session", users=2)
+    for name in ("a", "b", "c", "b", "d"):
+        limiter.take(session(name), "generate")
+    assert set(limiter.usage()) == {"session:b", "session:d"}
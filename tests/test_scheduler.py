@@ -0,0 +1,48 @@
+import asyncio
+from atelier_client_webui.scheduler import FairScheduler
+
+async def hold(scheduler, endpoint, user, order, release=None):
+    async with scheduler.slot(endpoint, user):
+        order.append((endpoint, user))
+        if release is not None:
+            await release.wait()
+
+def test_light_requests_overtake_a_burst_of_heavy_ones():
+    async def run():
+        scheduler, order, release = FairScheduler(1), [], asyncio.Event()
+        holder = asyncio.ensure_future(hold(scheduler, "caption", "x", order, release))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(hold(scheduler, "enhance", "heavy", order)),
+                   asyncio.ensure_future(hold(scheduler, "enhance", "heavy", order)),
+                   asyncio.ensure_future(hold(scheduler, "caption", "light", order))]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, *waiters)
+        return order, scheduler.active
+    order, active = asyncio.run(run())
+    assert order == [("caption", "x"), ("caption", "light"), ("enhance", "heavy"), ("enhance", "heavy")]
+    assert active == 0
+
+def test_cancelled_waiters_pass_their_slot_on():
+    async def run():
+        scheduler, order = FairScheduler(1), []
+        holder = scheduler.slot("generate", "a")
+        await holder.__aenter__()
+        queued = asyncio.ensure_future(hold(scheduler, "generate", "b", order))
+        granted = asyncio.ensure_future(hold(scheduler, "generate", "c", order))
+        last = asyncio.ensure_future(hold(scheduler, "generate", "d", order))
+        await asyncio.sleep(0)
+        # Cancelled while waiting
+        queued.cancel()
+        await asyncio.sleep(0)
+        # Hands the slot to the next waiter without yielding to it
+        await holder.__aexit__(None, None, None)
+        # Cancelled after the slot was handed to it, before it resumed
+        granted.cancel()
+        await asyncio.gather(queued, granted, return_exceptions=True)
+        await asyncio.wait_for(last, 1)
+        return order, scheduler.active, scheduler.waiting
+    order, active, waiting = asyncio.run(run())
+    assert order == [("generate", "d")]
+    assert active == 0
+    assert waiting == []